@@ -1,40 +1,23 @@
 import os
-import matplotlib.pyplot as plt
-import numpy as np
-import math
+import tabulate
 # Начало и конец интервала, шаг дискретизации
 Xs = -15
 Xf = 5
 dX = 0.01
 def F(x):
-        return 100*((abs(1-0.01*x*x))**0.5)+0.01*abs(X+10)
-# Список точек для определения значения функции и пустой список значений
-X = np.array([i*dX+Xs for i in range(int((Xf-Xs)/dX))])
-Y = F(X)
-# Определение положения файла
-dirname = os.path.dirname(__file__)
-# Проверка существования папки и ей создание при отсутствии
-filename = os.path.join(dirname, 'results')
-if os.path.exists(filename)==False:
-    os.mkdir(filename)
-# Создание файла, начало записи
-filename = os.path.join(filename, 'results.xml')
-with open(filename, 'w') as f:
-        # Шапка файла
-        f.write('<?xml version="1.1" encoding="UTF-8" ?>\n')
-        # Данные
-        f.write('<data>\n')
-        f.write('\t<xdata>\n')
-        for i in range(len(X)):
-            f.write('\t\t<x>' + str(X[i]) + '</x>\n')
-        f.write('\t</xdata>\n')
-        f.write('\t<ydata>\n')
-        for i in range(len(Y)):
-            f.write('\t\t<y>' + str(Y[i]) + '</y>\n')
-        f.write('\t</ydata>\n')
-        f.write('</data>')
-#Построение графика
-plt.plot(X,Y)
-plt.show()
-
-
+        return 100*((abs(1-0.01*x*x))**0.5)+0.01*abs(x+10)
+if __name__ == '__main__':
+    # Определение положения файла
+    dirname = os.path.dirname(__file__)
+    # Проверка существования папки и ей создание при отсутствии
+    filename = os.path.join(dirname, 'results')
+    if os.path.exists(filename)==False:
+        os.mkdir(filename)
+    # Создание файла и запись данных блоками (сетка и значения функции не хранятся целиком)
+    filename = os.path.join(filename, 'results.xml')
+    tabulate.writeXML(filename, F, Xs, Xf, dX)
+    #Построение графика (не более 100000 точек)
+    import matplotlib.pyplot as plt
+    X, Y = tabulate.sample(F, Xs, Xf, dX, 100000)
+    plt.plot(X,Y)
+    plt.show()
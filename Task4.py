@@ -2,35 +2,10 @@
 import pylab
 import numpy
 import tools
-import math
-
-class GaussianPlaneWaveM:
-    ''' Класс с уравнением плоской волны для гауссова сигнала в дискретном виде
-    d - определяет задержку сигнала.
-    w - определяет ширину сигнала.
-    Sc - число Куранта.
-    eps - относительная диэлектрическая проницаемость среды, в которой расположен источник.
-    mu - относительная магнитная проницаемость среды, в которой расположен источник.
-    '''
-    def __init__(self, d, w, Tm,  Sc=1.0, eps=1.0, mu=1.0):
-        self.d = d
-        self.w = w
-        self.Tm = Tm
-        self.Sc = Sc
-        self.eps = eps
-        self.mu = mu
-        
-    def getE(self, m, q):
-        '''
-        Расчет поля E в дискретной точке пространства m
-        в дискретный момент времени q
-        '''
-        return numpy.sin(2*math.pi*q/Tm) * numpy.exp(-(((q - m * numpy.sqrt(self.eps * self.mu) / self.Sc) - self.d) / self.w) ** 2)
+import fdtd
+from sources import GaussianPlaneWaveM
 
 if __name__ == '__main__':
-    # Волновое сопротивление свободного пространства
-    W0 = 120.0 * numpy.pi
-
     # Число Куранта
     Sc = 1.0
 
@@ -49,7 +24,8 @@ if __name__ == '__main__':
     # Шаг по времени
     dt = Sc * dx / 300000000
     
-    # Датчики для регистрации поля
+    # Датчики для регистрации поля: отраженной волны (в области
+    # рассеянного поля, левее источника) и падающей волны
     probesPos = [25,75]
     probes = [tools.Probe(pos, maxTime) for pos in probesPos]
 
@@ -75,20 +51,18 @@ if __name__ == '__main__':
     eps[lay_2:] = eps3
     mu = numpy.ones(maxSize-1)
 
-    # Коэффициенты для расчета E и H полей
-    K_E = Sc * W0 / eps
-    K_H = Sc / (W0 * mu)
-
-    Ez = numpy.zeros(maxSize)
-    Hy = numpy.zeros(maxSize-1)
+    # Расчетная область с поглощающими граничными условиями
+    engine = fdtd.FDTDEngine(maxSize, dx, Sc, eps, mu, boundary='mur')
 
     # Создание источника поля
     T = 60 # Половина длительности импульса (В отчетах)
     Tm = 120 # Период несущей (В отчетах)
     source = GaussianPlaneWaveM(2*T + 20, T, Tm, Sc, eps[sourcePos], mu[sourcePos])
+    engine.setSource(source, sourcePos, mode='tfsf',
+                     incidentSpan=probesPos[1] - sourcePos)
 
-    for probe in probes:
-        probe.addData(Ez, Hy)
+    engine.addProbe(probes[0])
+    engine.addIncidentProbe(probes[1])
 
     # Создание экземпляра класса для отображения
     # распределения поля в пространстве
@@ -100,48 +74,13 @@ if __name__ == '__main__':
     display.drawBoundary(lay_1)
     display.drawBoundary(lay_2)
 
-    # Расчет коэффициентов для граничных условий
-    K_L = (((Sc/numpy.sqrt(eps[0]*mu[0]))-1)/((Sc/numpy.sqrt(eps[0]*mu[0]))+1))
-    K_R = (((Sc/numpy.sqrt(eps[-1]*mu[-1]))-1)/((Sc/numpy.sqrt(eps[-1]*mu[-1]))+1))
-
-    #
-    Ez_oldL = Ez[1]
-    Ez_oldR = Ez[-1]
-
-    for q in range(1,maxTime):
-        # Расчет компоненты поля H
-        Hy =  Hy  + K_H * (Ez[1:] - Ez[:-1]) 
-
-        Hy[sourcePos-1] -= Sc / (W0 * mu[sourcePos-1]) * source.getE(0, q)
-
-        # Источник возбуждения
-        Ez[sourcePos] += Sc / numpy.sqrt(eps[sourcePos]*mu[sourcePos]) * source.getE(-0.5, q+0.5)
-        
-        # Расчет компоненты поля E
-        Hy_shift = Hy[:-1]
-        Ez[1:-1] = Ez[1:-1] + K_E[1:-1] * (Hy[1:] - Hy_shift)
-        Ez[0] = Ez_oldL + K_L * (Ez[1] - Ez[0])
-        Ez_oldL = Ez[1]
-        Ez[-1] = Ez_oldR + K_R * (Ez[-2] - Ez[-1])
-        Ez_oldR = Ez[-2]
-
-        # Регистрация поля в датчиках
-        for probe in probes:
-            probe.addData(Ez, Hy)
-
-        if q % 20 == 0:
-            display.updateData(Ez, q)
+    engine.run(maxTime, display, 20)
 
     display.stop()
 
     # Отображение сигнала, сохраненного в датчиках
     tools.showProbeSignals(probes, -1.1, 1.1, dt)
 
-    # Исключение отраженных волн из датчика падающей волны с помощью временного окна
-    # Временное окно равно длительности импульса + времени, необходимому волне для прохождения
-    # расстояния от левого края до диэлектрика (в вакууме)
-    probes[1].E[int(T + lay_st*dx/(300000000*dt)):] = 0
-
     # Формирование спектра падающей и отраженной волн
     spectr1 = tools.Spectrum(probes[0].E, dt, 30e9)
     spectr1.fourierTransform()
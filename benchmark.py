@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+'''
+Набор тестов производительности (без графического вывода).
+
+Тесты повторяют расчеты из заданий с фиксированными параметрами:
+    task3 - слой с потерями (550 ячеек, 800 шагов, как в Task3);
+    task4 - трехслойная структура (2000 ячеек, 6000 шагов, как в Task4);
+    film, filmGraded - тонкая пленка в большой области вакуума на
+        равномерной (planner.planGrid) и неравномерной
+        (planner.planGradedGrid) сетках;
+    spectrum - спектр сигнала датчика (tools.Spectrum.fourierTransform);
+    rcs - ЭПР сферы (Task2.cntRCS);
+    xml - запись таблицы функции в XML (Task1, tabulate.writeXML).
+
+Для каждого теста записываются время (лучшее из нескольких повторов),
+время отдельных этапов, производительность (для расчетов FDTD -
+количество обновлений ячеек в секунду) и пиковый объем памяти,
+выделенной во время теста. Результаты выводятся в формате JSON.
+
+Запуск из командной строки:
+    python benchmark.py --output bench.json
+    python benchmark.py task4 --repeat 5 --scaling
+'''
+
+import argparse
+import contextlib
+import functools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy
+
+import fdtd
+import instrumentation
+import planner
+import tools
+from sources import GaussianPlaneWave, GaussianPlaneWaveM
+
+
+@contextlib.contextmanager
+def _stage(stages: dict, name: str):
+    '''
+    Добавить время выполнения блока with к этапу name.
+    '''
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def task3(stages: dict, maxSize: int = 550, maxTime: int = 800,
+          timer=None) -> int:
+    '''
+    Расчет по Task3: среда с eps = 3.5, поглощающий слой с потерями,
+    источник в середине области, один датчик.
+    timer - экземпляр instrumentation.Instrumentation для измерения
+        времени этапов шага (или None).
+    Возвращает количество обновлений ячеек.
+    '''
+    with _stage(stages, 'setup'):
+        Sc = 1.0
+        dx = 0.01
+        eps = numpy.ones(maxSize) * 3.5
+        mu = numpy.ones(maxSize - 1)
+        layer_loss_x = maxSize - 100
+        loss = numpy.zeros(maxSize)
+        loss[layer_loss_x:] = 0.02
+
+        engine = fdtd.FDTDEngine(maxSize, dx, Sc, eps, mu, loss)
+        ceze = engine.ceze
+        cezh = engine.cezh
+        ceze[layer_loss_x] = (ceze[layer_loss_x - 1] + ceze[layer_loss_x + 1]) / 2
+        cezh[layer_loss_x] = (cezh[layer_loss_x - 1] + cezh[layer_loss_x + 1]) / 2
+
+        sourcePos = maxSize // 2
+        source = GaussianPlaneWave(45, 20, Sc, eps[sourcePos], mu[sourcePos])
+        engine.setSource(source, sourcePos,
+                         (1 / eps[sourcePos]) - 1, (1 / eps[sourcePos]) ** 2)
+        engine.addProbe(tools.Probe(int(maxSize * 0.75), maxTime))
+        engine.setInstrumentation(timer)
+
+    with _stage(stages, 'run'):
+        engine.run(maxTime)
+
+    return maxSize * maxTime
+
+
+def task4(stages: dict, maxSize: int = 2000, maxTime: int = 6000,
+          timer=None) -> int:
+    '''
+    Расчет по Task4: три слоя диэлектрика, граничные условия Мура,
+    источник TF/SF, датчики отраженной и падающей волн, спектры и
+    коэффициент отражения.
+    timer - экземпляр instrumentation.Instrumentation (или None).
+    Возвращает количество обновлений ячеек.
+    '''
+    with _stage(stages, 'setup'):
+        Sc = 1.0
+        dx = 0.00025
+        dt = Sc * dx / fdtd.c
+        lay_st = maxSize // 2
+        lay_1 = lay_st + int(0.04 / dx)
+        lay_2 = lay_1 + int(0.08 / dx)
+        eps = numpy.ones(maxSize)
+        eps[lay_st:lay_1] = 1.5
+        eps[lay_1:lay_2] = 5.9
+        eps[lay_2:] = 2.6
+        mu = numpy.ones(maxSize - 1)
+
+        engine = fdtd.FDTDEngine(maxSize, dx, Sc, eps, mu, boundary='mur')
+        sourcePos = 50
+        source = GaussianPlaneWaveM(140, 60, 120, Sc, eps[sourcePos], mu[sourcePos])
+        probes = [tools.Probe(25, maxTime), tools.Probe(75, maxTime)]
+        engine.setSource(source, sourcePos, mode='tfsf',
+                         incidentSpan=probes[1].position - sourcePos)
+        engine.addProbe(probes[0])
+        engine.addIncidentProbe(probes[1])
+        engine.setInstrumentation(timer)
+
+    with _stage(stages, 'run'):
+        engine.run(maxTime)
+
+    with _stage(stages, 'spectrum'):
+        spectr1 = tools.Spectrum(probes[0].E, dt, 30e9)
+        spectr1.fourierTransform()
+        spectr2 = tools.Spectrum(probes[1].E, dt, 30e9)
+        spectr2.fourierTransform()
+
+    return maxSize * maxTime
+
+
+def film(stages: dict, graded: bool = False, eps: float = 4.0,
+         d: float = 0.0001, fmax: float = 10e9, outside: float = 0.5,
+         timer=None) -> int:
+    '''
+    Расчет отражения от тонкой пленки (проницаемость eps, толщина d, м)
+    с областью вакуума длиной outside (м) за ней до частоты fmax.
+    Параметры области выбираются функцией planner.planGrid или (при
+    graded=True) planner.planGradedGrid: на неравномерной сетке мелкие
+    ячейки используются только в пленке, поэтому ячеек в несколько раз
+    меньше.
+    timer - экземпляр instrumentation.Instrumentation (или None).
+    Возвращает количество обновлений ячеек.
+    '''
+    with _stage(stages, 'setup'):
+        if graded:
+            plan = planner.planGradedGrid([eps], [d], fmax, outside=outside)
+            cells = plan.cells
+        else:
+            plan = planner.planGrid([eps], [d], fmax, outside=outside)
+            cells = plan.dx
+
+        engine = fdtd.FDTDEngine(plan.maxSize, cells, plan.Sc, plan.eps,
+                                 plan.mu, boundary='cpml')
+        source = GaussianPlaneWave(plan.delay, plan.width, plan.Sc,
+                                   plan.eps[plan.sourcePos],
+                                   plan.mu[plan.sourcePos])
+        engine.setSource(source, plan.sourcePos, mode='tfsf')
+        engine.addProbe(tools.Probe(plan.sourcePos // 2, plan.maxTime))
+        engine.addIncidentProbe(tools.Probe(plan.sourcePos, plan.maxTime))
+        engine.setInstrumentation(timer)
+
+    with _stage(stages, 'run'):
+        engine.run(plan.maxTime)
+
+    return plan.maxSize * plan.maxTime
+
+
+def spectrum(stages: dict, length: int = 6000, count: int = 100) -> int:
+    '''
+    Спектр сигнала длиной length отсчетов (count раз).
+    Возвращает количество обработанных отсчетов.
+    '''
+    with _stage(stages, 'setup'):
+        dt = 0.00025 / fdtd.c
+        q = numpy.arange(length)
+        signal = GaussianPlaneWaveM(140, 60, 120).getE(0, q)
+
+    with _stage(stages, 'fourierTransform'):
+        for _ in range(count):
+            spectr = tools.Spectrum(signal, dt, 30e9)
+            spectr.fourierTransform()
+
+    return length * count
+
+
+def rcs(stages: dict, N: int = 100000) -> int:
+    '''
+    ЭПР сферы радиусом 1 м в N точках по длине волны (Task2.cntRCS).
+    Возвращает количество точек.
+    '''
+    with _stage(stages, 'setup'):
+        import rcs as rcsModule
+        import Task2
+        # Таблицы функций Бесселя из предыдущих повторов не используются
+        rcsModule._besselCache.clear()
+        lambd_min = fdtd.c / 1e9
+        lambd_max = fdtd.c / 1e8
+        lambd = lambd_min + numpy.arange(N) * ((lambd_max - lambd_min) / N)
+
+    with _stage(stages, 'cntRCS'):
+        Task2.cntRCS(lambd, 1.0)
+
+    return N
+
+
+def xml(stages: dict, dX: float = 0.0001) -> int:
+    '''
+    Запись таблицы функции из Task1 в XML-файл (во временный каталог).
+    Возвращает количество точек.
+    '''
+    with _stage(stages, 'setup'):
+        import tabulate
+        import Task1
+
+    with tempfile.TemporaryDirectory() as dirname:
+        with _stage(stages, 'writeXML'):
+            tabulate.writeXML(os.path.join(dirname, 'results.xml'),
+                              Task1.F, Task1.Xs, Task1.Xf, dX)
+
+    return tabulate.pointsCount(Task1.Xs, Task1.Xf, dX)
+
+
+# Тесты и единицы измерения производительности
+cases = {
+    'task3': (task3, 'cellUpdatesPerSecond'),
+    'task4': (task4, 'cellUpdatesPerSecond'),
+    'film': (film, 'cellUpdatesPerSecond'),
+    'filmGraded': (functools.partial(film, graded=True), 'cellUpdatesPerSecond'),
+    'spectrum': (spectrum, 'samplesPerSecond'),
+    'rcs': (rcs, 'pointsPerSecond'),
+    'xml': (xml, 'pointsPerSecond'),
+}
+
+
+# Тесты с временным циклом FDTD (поддерживают параметр timer)
+loopCases = ('task3', 'task4', 'film', 'filmGraded')
+
+
+def measure(case, repeat: int = 3, profile: bool = False, **params) -> dict:
+    '''
+    Выполнить тест repeat раз и однократно с измерением памяти.
+    Возвращает словарь с лучшим временем, временами этапов для лучшего
+    повтора, объемом работы (например, количеством обновлений ячеек),
+    производительностью и пиковым объемом памяти (байт).
+    profile - для тестов с временным циклом дополнительно выполнить
+        расчет с измерением времени этапов шага (см. модуль
+        instrumentation), сводка записывается в поле loopStages.
+    '''
+    function, unit = cases[case]
+
+    results = []
+    for _ in range(repeat):
+        stages = {}
+        start = time.perf_counter()
+        work = function(stages, **params)
+        results.append((time.perf_counter() - start, stages))
+    best, stages = min(results, key=lambda result: result[0])
+
+    # Память измеряется отдельно, так как tracemalloc замедляет расчет
+    tracemalloc.start()
+    try:
+        function({}, **params)
+        peakMemory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    result = {'params': params,
+              'time': best,
+              'times': [result[0] for result in results],
+              'stages': stages,
+              'work': work,
+              unit: work / best,
+              'peakMemory': peakMemory}
+
+    if profile and case in loopCases:
+        timer = instrumentation.Instrumentation()
+        function({}, timer=timer, **params)
+        result['loopStages'] = timer.summary()
+    return result
+
+
+def scaling(repeat: int = 1, sizes=(500, 1000, 2000, 4000, 8000),
+            steps=(1000, 2000, 4000, 8000)) -> list:
+    '''
+    Производительность расчета task4 в зависимости от размера области
+    (при 2000 шагах) и от количества шагов (при 2000 ячейках).
+    '''
+    return ([measure('task4', repeat, maxSize=maxSize, maxTime=2000)
+             for maxSize in sizes]
+            + [measure('task4', repeat, maxSize=2000, maxTime=maxTime)
+               for maxTime in steps])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Тесты производительности (результаты в формате JSON)')
+    parser.add_argument('cases', nargs='*',
+                        help='тесты: {} (по умолчанию - все)'.format(
+                            ', '.join(cases)))
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='количество повторов каждого теста')
+    parser.add_argument('--profile', action='store_true',
+                        help='время этапов шага для расчетов FDTD')
+    parser.add_argument('--scaling', action='store_true',
+                        help='зависимость производительности FDTD от '
+                             'размера области и количества шагов')
+    parser.add_argument('--output', default=None,
+                        help='файл для записи результатов '
+                             '(по умолчанию - стандартный вывод)')
+    args = parser.parse_args()
+    for case in args.cases:
+        if case not in cases:
+            parser.error('неизвестный тест: {}'.format(case))
+
+    report = {'python': platform.python_version(),
+              'numpy': numpy.__version__,
+              'platform': platform.platform(),
+              'processor': platform.processor(),
+              'cpuCount': os.cpu_count(),
+              'cases': {}}
+    for case in args.cases or list(cases):
+        report['cases'][case] = measure(case, args.repeat, args.profile)
+    if args.scaling:
+        report['scaling'] = scaling(args.repeat)
+
+    text = json.dumps(report, indent=2)
+    if args.output is None:
+        sys.stdout.write(text + '\n')
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
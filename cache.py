@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+'''
+Модуль для кэширования результатов расчетов на диске.
+
+Ключ результата - хэш SHA-256 полного описания расчета (словари, списки,
+числа, строки, массивы numpy и объекты с атрибутами) и версии кода
+(содержимого файлов модулей, которые участвуют в расчете), поэтому
+изменение параметров или кода приводит к новому ключу. Каждый результат
+хранится в отдельном файле .npz с именем, равным ключу.
+
+Файлы записываются под временным именем и переименовываются, поэтому
+несколько процессов могут одновременно читать и записывать кэш. Время
+изменения файла обновляется при каждом чтении, и при превышении размера
+кэша удаляются файлы, которые дольше всего не использовались (LRU).
+'''
+
+import functools
+import hashlib
+import os
+import tempfile
+
+import numpy
+
+# Папка для кэша по умолчанию
+defaultDirectory = os.environ.get(
+    'FDTD_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'fdtd-results'))
+
+
+def _update(hasher, value):
+    '''
+    Добавить в хэш однозначное представление значения value.
+    '''
+    if isinstance(value, dict):
+        hasher.update(b'd%d' % len(value))
+        for key in sorted(value, key=str):
+            _update(hasher, str(key))
+            _update(hasher, value[key])
+    elif isinstance(value, (list, tuple)):
+        hasher.update(b'l%d' % len(value))
+        for item in value:
+            _update(hasher, item)
+    elif isinstance(value, numpy.ndarray) or isinstance(value, numpy.generic):
+        value = numpy.ascontiguousarray(value)
+        hasher.update('a{}{}'.format(value.dtype.str, value.shape).encode())
+        hasher.update(value.tobytes())
+    elif isinstance(value, (str, bytes)):
+        data = value.encode() if isinstance(value, str) else value
+        hasher.update(b's%d:' % len(data))
+        hasher.update(data)
+    elif value is None or isinstance(value, (bool, int, float, complex, slice)):
+        hasher.update('v{!r}'.format(value).encode())
+    elif hasattr(value, '__dict__'):
+        hasher.update('o{}.{}'.format(type(value).__module__,
+                                      type(value).__qualname__).encode())
+        _update(hasher, vars(value))
+    else:
+        raise ValueError('Значение не может быть использовано в ключе кэша: {!r}'.format(value))
+
+
+def configHash(config) -> str:
+    '''
+    Хэш SHA-256 (шестнадцатеричная строка) описания расчета config.
+    '''
+    hasher = hashlib.sha256()
+    _update(hasher, config)
+    return hasher.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _fileHash(filename: str, mtime: float, size: int) -> str:
+    with open(filename, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def codeVersion(*modules) -> str:
+    '''
+    Версия кода: хэш содержимого файлов модулей modules.
+    '''
+    hashes = []
+    for module in modules:
+        stat = os.stat(module.__file__)
+        hashes.append(_fileHash(module.__file__, stat.st_mtime, stat.st_size))
+    return configHash(hashes)
+
+
+class ResultCache:
+    '''
+    Кэш результатов расчетов на диске (результат - набор именованных
+    массивов numpy).
+    '''
+    def __init__(self, directory: str = None, maxBytes: int = 1 << 30):
+        '''
+        directory - папка для файлов кэша (по умолчанию - значение
+            переменной окружения FDTD_CACHE_DIR или ~/.cache/fdtd-results).
+        maxBytes - максимальный суммарный размер файлов кэша, байт.
+        '''
+        self.directory = defaultDirectory if directory is None else directory
+        self.maxBytes = maxBytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, config, *modules) -> str:
+        '''
+        Ключ результата для описания расчета config и версии кода модулей
+        modules.
+        '''
+        return configHash([config, codeVersion(*modules)])
+
+    def path(self, key: str) -> str:
+        '''
+        Имя файла с результатом для ключа key.
+        '''
+        return os.path.join(self.directory, key + '.npz')
+
+    def get(self, key: str) -> dict:
+        '''
+        Результат для ключа key (словарь {имя: массив}) или None, если
+        его нет в кэше.
+        '''
+        filename = self.path(key)
+        try:
+            with numpy.load(filename) as data:
+                result = {name: data[name] for name in data.files}
+            os.utime(filename)
+        except (OSError, ValueError):
+            # Файл отсутствует или удален другим процессом во время чтения
+            return None
+        return result
+
+    def put(self, key: str, **arrays):
+        '''
+        Сохранить результат для ключа key и при необходимости удалить
+        давно не использовавшиеся результаты.
+        '''
+        handle, temp = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                numpy.savez(f, **arrays)
+            os.replace(temp, self.path(key))
+        except BaseException:
+            os.unlink(temp)
+            raise
+        self.evict()
+
+    def cached(self, config, compute, *modules) -> dict:
+        '''
+        Результат расчета из кэша или, если его нет, результат вызова
+        compute() (словарь {имя: массив}), который сохраняется в кэш.
+        '''
+        key = self.key(config, *modules)
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, **result)
+        return result
+
+    def evict(self):
+        '''
+        Удалить давно не использовавшиеся результаты, чтобы суммарный
+        размер кэша не превышал maxBytes.
+        '''
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.npz'):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, filename in sorted(entries):
+            if total <= self.maxBytes:
+                break
+            try:
+                os.unlink(filename)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        '''
+        Удалить все результаты.
+        '''
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npz'):
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+
+
+def runCached(cache: ResultCache, engine, maxTime: int, **params) -> bool:
+    '''
+    Выполнить расчет engine.run(maxTime, **params) или, если такой же
+    расчет уже есть в кэше, восстановить его результат: поля, сигналы и
+    спектры во всех датчиках и номер шага (в формате контрольной точки,
+    см. FDTDEngine.saveCheckpoint). Датчики, отображенные в память
+    (tools.SnapshotFile), не восстанавливаются.
+
+    Возвращает True, если результат взят из кэша.
+    '''
+    import fdtd
+    import materials
+    import sources
+    import tools
+
+    # Объект для отображения не влияет на результат
+    config = {'engine': engine.configuration(), 'maxTime': maxTime,
+              'params': {name: value for name, value in params.items()
+                         if name != 'display'}}
+    key = cache.key(config, fdtd, materials, sources, tools)
+    filename = cache.path(key)
+    try:
+        engine.loadCheckpoint(filename)
+        os.utime(filename)
+        return True
+    except (OSError, ValueError, KeyError):
+        pass
+
+    engine.run(maxTime, **params)
+    engine.saveCheckpoint(filename)
+    cache.evict()
+    return False
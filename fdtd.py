@@ -0,0 +1,767 @@
+# -*- coding: utf-8 -*-
+'''
+Модуль с реализацией одномерного метода FDTD.
+
+Все массивы полей и промежуточных результатов выделяются один раз при
+создании расчетной области, а обновление полей на каждом шаге выполняется
+на месте (с помощью параметра out универсальных функций numpy), поэтому
+во временном цикле не создаются новые массивы.
+'''
+
+import os
+import tempfile
+
+import numpy
+
+# Волновое сопротивление свободного пространства
+W0 = 120.0 * numpy.pi
+
+# Скорость света в вакууме
+c = 300000000.0
+
+
+class FDTDEngine:
+    '''
+    Класс для расчета распространения ЭМ волны в одномерной области
+    методом FDTD (компоненты Ez и Hy).
+    '''
+    # Количество временных шагов, для которых значения источника
+    # рассчитываются за один раз
+    sourceBlockSize = 4096
+
+    # Минимальная толщина слоя CPML вспомогательной сетки источника TF/SF
+    # (отражение от ее края попадает в падающую волну)
+    auxCPMLSize = 40
+
+    def __init__(self, maxSize: int, dx: float, Sc: float = 1.0,
+                 eps=1.0, mu=1.0, loss=0.0, boundary: str = None,
+                 nConfigs: int = None):
+        '''
+        maxSize - размер области моделирования в отсчетах.
+        dx - размер ячейки разбиения: число или массив длиной maxSize - 1
+            для неравномерной сетки (dx[i] - расстояние между узлами
+            Ez[i] и Ez[i + 1], см. planner.planGradedGrid).
+        Sc - число Куранта (для неравномерной сетки - для самой маленькой
+            ячейки).
+        eps - относительная диэлектрическая проницаемость (число или массив
+            длиной maxSize).
+        mu - относительная магнитная проницаемость (число или массив
+            длиной maxSize - 1).
+        loss - потери в среде (число или массив длиной maxSize).
+        boundary - тип граничных условий: None - поле Ez на краях равно 0,
+            'mur' - поглощающие граничные условия Мура первого порядка,
+            'cpml' - сверточный идеально согласованный слой (CPML) на обоих
+            краях, параметры слоя задаются методом setCPML.
+        nConfigs - количество одновременно рассчитываемых конфигураций.
+            Если задано, поля имеют размер (nConfigs, maxSize), а eps, mu и
+            loss могут задаваться для каждой конфигурации отдельно
+            (массивы размером (nConfigs, maxSize) или (nConfigs, 1)).
+        '''
+        if boundary not in (None, 'mur', 'cpml'):
+            raise ValueError('Неизвестный тип граничных условий: {}'.format(boundary))
+
+        self.maxSize = maxSize
+        self.dx = dx
+        self.Sc = Sc
+        self.boundary = boundary
+        self.nConfigs = nConfigs
+
+        # Размер массивов по измерению конфигураций
+        batch = () if nConfigs is None else (nConfigs,)
+
+        # Параметры среды
+        self.eps = numpy.ones(batch + (maxSize,)) * eps
+        self.mu = numpy.ones(batch + (maxSize - 1,)) * mu
+        self.loss = numpy.ones(batch + (maxSize,)) * loss
+
+        # Размеры ячеек и локальные числа Куранта c dt / dx для узлов H
+        # (по размеру ячейки) и узлов E (по расстоянию между соседними
+        # узлами H). Для равномерной сетки они равны Sc.
+        self.uniform = numpy.ndim(dx) == 0
+        self._cells = numpy.broadcast_to(numpy.asarray(dx, dtype=float),
+                                         (maxSize - 1,))
+        self.dt = Sc * self._cells.min() / c
+        if self.uniform:
+            self._ScH = Sc
+            self._ScE = Sc
+        else:
+            dual = numpy.concatenate(([self._cells[0]],
+                                      (self._cells[:-1] + self._cells[1:]) / 2,
+                                      [self._cells[-1]]))
+            self._ScH = c * self.dt / self._cells
+            self._ScE = c * self.dt / dual
+
+            # Веса узлов E и H при расчете энергии (длины ячеек в
+            # единицах самой маленькой ячейки)
+            self._weightE = dual / self._cells.min()
+            self._weightH = self._cells / self._cells.min()
+
+        # Коэффициенты для расчета поля E
+        self.ceze = (1 - self.loss) / (1 + self.loss)
+        self.cezh = self._ScE * W0 / (self.eps * (1 + self.loss))
+
+        # Коэффициенты для расчета поля H
+        self.chyh = (1 - self.loss[..., :-1]) / (1 + self.loss[..., :-1])
+        self.chye = self._ScH / (W0 * self.mu * (1 + self.loss[..., :-1]))
+
+        # Если потерь нет, умножение на ceze и chyh можно пропустить
+        self._lossy = bool(numpy.any(self.loss != 0))
+
+        # Поля
+        self.Ez = numpy.zeros(batch + (maxSize,))
+        self.Hy = numpy.zeros(batch + (maxSize - 1,))
+
+        # Вспомогательные массивы для разностей полей
+        self._dEz = numpy.zeros(batch + (maxSize - 1,))
+        self._dHy = numpy.zeros(batch + (maxSize - 2,))
+
+        # Срезы массивов, используемые на каждом шаге. Срезы являются
+        # представлениями, поэтому изменения коэффициентов после создания
+        # объекта (например, усреднение на границе слоя) учитываются.
+        self._EzLeft = self.Ez[..., :-1]
+        self._EzRight = self.Ez[..., 1:]
+        self._EzInner = self.Ez[..., 1:-1]
+        self._HyLeft = self.Hy[..., :-1]
+        self._HyRight = self.Hy[..., 1:]
+        self._cezeInner = self.ceze[..., 1:-1]
+        self._cezhInner = self.cezh[..., 1:-1]
+
+        # Коэффициенты для граничных условий Мура (для каждой конфигурации)
+        self.K_L = self._murCoefficient(self.eps[..., 0] * self.mu[..., 0],
+                                        self._localSc(0))
+        self.K_R = self._murCoefficient(self.eps[..., -1] * self.mu[..., -1],
+                                        self._localSc(-1))
+        self.Ez_oldL = numpy.zeros(batch)
+        self.Ez_oldR = numpy.zeros(batch)
+
+        # Области CPML и их параметры
+        self._cpml = []
+        self._cpmlParams = {}
+        if boundary == 'cpml':
+            self.setCPML()
+
+        # Области с диспергирующими средами
+        self._dispersive = []
+
+        # Источник и датчики
+        self._source = None
+        self._aux = None
+        self.probes = []
+
+        # Максимальная энергия в области (для досрочного завершения
+        # расчета)
+        self._energyMax = numpy.zeros(batch)
+
+        # Измерение времени этапов (см. модуль instrumentation)
+        self.instrumentation = None
+
+        # Файл и период сохранения контрольных точек
+        self._checkpoint = None
+
+        # Номер текущего временного шага
+        self.q = 0
+
+    def _localSc(self, index):
+        '''
+        Число Куранта для ячейки index (между узлами Ez[index] и
+        Ez[index + 1]).
+        '''
+        return self._ScH if self.uniform else self._ScH[index]
+
+    def _murCoefficient(self, epsmu: float, Sc: float) -> float:
+        '''
+        Коэффициент граничного условия Мура для среды с произведением
+        проницаемостей epsmu и числом Куранта Sc у края области.
+        '''
+        k = Sc / numpy.sqrt(epsmu)
+        return (k - 1) / (k + 1)
+
+    def setCPML(self, size: int = 10, order: float = 3,
+                sigmaMax=None, kappaMax: float = 1.0, alphaMax: float = 0.0):
+        '''
+        Задать параметры сверточного идеально согласованного слоя (CPML)
+        на обоих краях области. Проводимость и kappa растут от внутренней
+        границы слоя к краю области по степенному закону, alpha - убывает
+        линейно.
+
+        size - толщина слоя в ячейках.
+        order - степень полинома для изменения параметров в слое.
+        sigmaMax - максимальная проводимость, См/м. По умолчанию
+            используется оптимальное значение 0.8 (order + 1) / (W0 dx n),
+            где n - показатель преломления среды на краю области.
+        kappaMax - максимальное значение kappa.
+        alphaMax - максимальное значение alpha, См/м.
+        '''
+        # Параметры сохраняются для слоя CPML вспомогательной сетки
+        # источника TF/SF (см. setSource)
+        self._cpmlParams = {'size': size, 'order': order, 'sigmaMax': sigmaMax,
+                            'kappaMax': kappaMax, 'alphaMax': alphaMax}
+
+        # Множитель для перевода проводимости в безразмерный вид
+        # (sigma * dt / eps0, eps0 = 1 / (W0 * c))
+        norm = self.dt * W0 * c
+
+        def coefficients(depth, epsmu, dx):
+            '''
+            Коэффициенты b, a и 1 / kappa для точек на глубине depth
+            (в долях толщины слоя) в среде с произведением проницаемостей
+            epsmu и размером ячеек dx.
+            '''
+            if sigmaMax is None:
+                sMax = 0.8 * (order + 1) / (W0 * dx * numpy.sqrt(epsmu))
+            else:
+                sMax = numpy.asarray(sigmaMax)
+            sigma = numpy.asarray(sMax)[..., None] * depth ** order * norm
+            kappa = 1 + (kappaMax - 1) * depth ** order
+            alpha = alphaMax * (1 - depth) * norm
+            b = numpy.exp(-(sigma / kappa + alpha))
+            a = sigma / (sigma * kappa + kappa ** 2 * alpha) * (b - 1)
+            return b, a, numpy.broadcast_to(1 / kappa, b.shape)
+
+        M = self.maxSize
+        N = size
+        batch = self.Ez.shape[:-1]
+        epsmuL = self.eps[..., 0] * self.mu[..., 0]
+        epsmuR = self.eps[..., -1] * self.mu[..., -1]
+
+        # Для каждой области: срез массива разностей полей E (для расчета H),
+        # коэффициенты, срез массива разностей H (для расчета E), коэффициенты.
+        # Разность dHy[k] соответствует узлу Ez[k + 1].
+        regions = [
+            (slice(0, N), (N - numpy.arange(N) - 0.5) / N, epsmuL,
+             slice(0, N - 1), (N - numpy.arange(1, N)) / N, self._cells[0]),
+            (slice(M - 1 - N, M - 1), (numpy.arange(N) + 0.5) / N, epsmuR,
+             slice(M - 1 - N, M - 2), numpy.arange(1, N) / N, self._cells[-1]),
+        ]
+
+        self._cpml = []
+        for sliceH, depthH, epsmu, sliceE, depthE, dx in regions:
+            bH, aH, kH = coefficients(depthH, epsmu, dx)
+            bE, aE, kE = coefficients(depthE, epsmu, dx)
+            self._cpml.append((sliceH, bH, aH, kH, numpy.zeros(batch + (N,)),
+                               sliceE, bE, aE, kE, numpy.zeros(batch + (N - 1,))))
+
+    def _applyCPML(self, diff: numpy.ndarray, field: str):
+        '''
+        Изменить разности полей в областях CPML: разность делится на kappa
+        и к ней добавляется свертка psi.
+
+        diff - массив разностей поля E (field == 'H') или H (field == 'E').
+        '''
+        offset = 0 if field == 'H' else 5
+        for region in self._cpml:
+            region_slice, b, a, invKappa, psi = region[offset:offset + 5]
+            d = diff[..., region_slice]
+            psi *= b
+            psi += a * d
+            d *= invKappa
+            d += psi
+
+    def addDispersiveMaterial(self, material, start: int, stop: int):
+        '''
+        Заполнить ячейки start..stop-1 диспергирующей средой (см. модуль
+        materials). Поляризация каждого полюса рассчитывается методом
+        вспомогательных дифференциальных уравнений во всех ячейках
+        области сразу.
+
+        material - экземпляр materials.DispersiveMaterial.
+        start, stop - границы области (номера ячеек поля Ez, кроме
+            крайних).
+        '''
+        if not 1 <= start < stop <= self.maxSize - 1:
+            raise ValueError('Неверные границы диспергирующей среды')
+
+        region = slice(start, stop)
+        self.eps[..., region] = material.epsInf
+        ScE = self._ScE if self.uniform else self._ScE[region]
+        self.cezh[..., region] = (ScE * W0 /
+                                  (self.eps[..., region] * (1 + self.loss[..., region])))
+
+        shape = self.Ez[..., region].shape
+        poles = []
+        for pole in material.poles:
+            C1, C2, C3 = pole.coefficients(self.dt)
+            poles.append([C1, C2, C3, numpy.zeros(shape), numpy.zeros(shape)])
+
+        # Множитель при изменении поляризации в уравнении для поля E
+        coefP = self.cezh[..., region] / (ScE * W0)
+        self._dispersive.append((region, coefP, poles, numpy.zeros(shape)))
+
+    def _updatePolarization(self):
+        '''
+        Рассчитать поляризацию на следующем шаге по текущему полю E.
+        Изменение поляризации сохраняется для учета в _applyPolarization.
+        '''
+        for region, coefP, poles, dP in self._dispersive:
+            E = self.Ez[..., region]
+            dP[...] = 0
+            for pole in poles:
+                C1, C2, C3, P, Pold = pole
+                # Pold <- P(n+1) = C1 P(n) + C2 P(n-1) + C3 E(n)
+                Pold *= C2
+                Pold += C1 * P
+                Pold += C3 * E
+                dP += Pold
+                dP -= P
+                pole[3], pole[4] = Pold, P
+
+    def _applyPolarization(self):
+        '''
+        Учесть изменение поляризации в поле E.
+        '''
+        for region, coefP, poles, dP in self._dispersive:
+            dP *= coefP
+            self.Ez[..., region] -= dP
+
+    def setSource(self, source, position, mE=-0.5, qShift=0.5,
+                  mode: str = 'analytic', incidentSpan: int = 0):
+        '''
+        Установить источник плоской волны, распространяющейся вправо.
+        Область слева от источника является областью рассеянного поля
+        (в ней присутствуют только отраженные волны), справа - областью
+        полного поля.
+
+        source - источник (см. модуль sources) или любой объект с методом
+            getE(m, q), принимающим массивы numpy, либо список таких
+            объектов (по одному на каждую конфигурацию).
+        position - положение источника (номер ячейки); при расчете
+            нескольких конфигураций может задаваться для каждой отдельно.
+        mE, qShift - смещения по пространству и по времени, с которыми
+            рассчитывается добавка к полю E (числа или массивы по
+            конфигурациям). Используются только в режиме 'analytic'.
+        mode - способ расчета падающей волны на границе областей:
+            'analytic' - по формуле источника;
+            'tfsf' - с помощью вспомогательной однородной сетки (с
+            параметрами среды в точке источника), которую возбуждает
+            жесткий источник. Падающая волна при этом учитывает численную
+            дисперсию, поэтому компенсация в области рассеянного поля
+            точная при любом числе Куранта, а падающую волну можно
+            регистрировать датчиками (см. addIncidentProbe).
+        incidentSpan - количество ячеек справа от источника, в которых
+            можно регистрировать падающую волну (режим 'tfsf').
+            Вспомогательная сетка заканчивается сразу за ними слоем CPML
+            с параметрами, заданными методом setCPML (толщиной не меньше
+            auxCPMLSize), поэтому setCPML нужно вызывать до setSource.
+        '''
+        if mode not in ('analytic', 'tfsf'):
+            raise ValueError('Неизвестный режим источника: {}'.format(mode))
+
+        if mode == 'tfsf' and numpy.min(position) < 3:
+            raise ValueError('Источник TF/SF расположен слишком близко к краю области')
+
+        if self.nConfigs is None:
+            indexE = position
+            indexH = position - 1
+            indexAux = position - 2
+        else:
+            rows = numpy.arange(self.nConfigs)
+            position = numpy.broadcast_to(position, (self.nConfigs,))
+            indexE = (rows, position)
+            indexH = (rows, position - 1)
+            indexAux = (rows, position - 2)
+
+        self._aux = None
+        if mode == 'tfsf':
+            # Вспомогательная сетка для расчета падающей волны. Жесткий
+            # источник расположен на две ячейки левее границы областей.
+            # Поле справа от жесткого источника не зависит от поля слева
+            # от него, поэтому слой CPML нужен только на правом краю
+            # сетки, который находится сразу за incidentSpan ячейками
+            # для датчиков падающей волны.
+            # На неравномерной сетке вспомогательная сетка равномерная
+            # с размером ячейки в точке источника и тем же шагом по времени
+            if self.uniform:
+                dx, Sc = self.dx, self.Sc
+            else:
+                dx = numpy.unique(self._cells[numpy.atleast_1d(position) - 1])
+                if len(dx) > 1:
+                    raise ValueError('Источники TF/SF должны находиться в ячейках одного размера')
+                dx = float(dx[0])
+                Sc = c * self.dt / dx
+            params = dict(self._cpmlParams)
+            params['size'] = max(params.get('size', 0), self.auxCPMLSize)
+            auxSize = int(numpy.max(position)) + incidentSpan + params['size'] + 2
+            aux = FDTDEngine(auxSize, dx, Sc,
+                             self.eps[indexE][..., None],
+                             self.mu[indexE][..., None],
+                             boundary='cpml', nConfigs=self.nConfigs)
+            aux.setCPML(**params)
+            # Левый слой CPML не используется (см. выше)
+            del aux._cpml[0]
+            # Допустимые положения датчиков падающей волны (для всех
+            # конфигураций)
+            self._auxLimits = (int(numpy.max(position)),
+                               int(numpy.min(position)) + incidentSpan)
+            self._aux = (aux, indexAux)
+            coefH = self.chye[indexH]
+            coefE = self.cezh[indexE]
+        else:
+            ScH = self._localSc(indexH[-1] if self.nConfigs is not None else indexH)
+            coefH = ScH / (W0 * self.mu[indexH])
+            coefE = ScH / numpy.sqrt(self.eps[indexE] * self.mu[indexE])
+
+        self._source = (source, indexH, indexE, coefH, coefE, mE, qShift)
+
+        # Таблицы добавок к полям H и E (в режиме 'tfsf' - значения
+        # жесткого источника), рассчитанные заранее для блока
+        # из sourceBlockSize временных шагов, начиная с шага _sourceStart
+        self._sourceStart = None
+        self._sourceH = None
+        self._sourceE = None
+
+    def addIncidentProbe(self, probe):
+        '''
+        Добавить датчик, регистрирующий только падающую волну (только для
+        источника в режиме 'tfsf'). Датчик должен находиться не левее
+        источника (слева от него во вспомогательной сетке - волна,
+        излучаемая жестким источником влево) и не правее incidentSpan
+        ячеек от него (см. setSource).
+        '''
+        if self._aux is None:
+            raise ValueError('Падающая волна рассчитывается только в режиме tfsf')
+        positions = getattr(probe, 'positions', getattr(probe, 'position', 0))
+        first, last = self._auxLimits
+        if numpy.min(positions) < first:
+            raise ValueError('Датчик падающей волны должен находиться не левее источника')
+        if numpy.max(positions) > last:
+            raise ValueError('Датчик падающей волны находится за пределами '
+                             'вспомогательной сетки (увеличьте incidentSpan)')
+        self._aux[0].addProbe(probe)
+
+    def _sourceTable(self, m, q: numpy.ndarray) -> numpy.ndarray:
+        '''
+        Значения сигнала источника (или источников) в точке m в моменты
+        времени q. Возвращает массив (len(q),) или (len(q), nConfigs).
+        '''
+        source = self._source[0]
+        if isinstance(source, (list, tuple)):
+            m = numpy.broadcast_to(m, (len(source),))
+            return numpy.stack([s.getE(mi, q) for s, mi in zip(source, m)],
+                               axis=-1)
+
+        if self.nConfigs is None:
+            return source.getE(m, q)
+
+        return numpy.broadcast_to(source.getE(m, q[:, None]),
+                                  (len(q), self.nConfigs))
+
+    def _fillSourceTables(self, q: int):
+        '''
+        Рассчитать таблицы добавок источника для шагов q..q+sourceBlockSize-1.
+        '''
+        _, _, _, coefH, coefE, mE, qShift = self._source
+        times = numpy.arange(q, q + self.sourceBlockSize, dtype=float)
+        if self._aux is not None:
+            self._sourceE = self._sourceTable(0, times)
+        else:
+            self._sourceH = coefH * self._sourceTable(0, times)
+            self._sourceE = coefE * self._sourceTable(mE, times + qShift)
+        self._sourceStart = q
+
+    def addProbe(self, probe):
+        '''
+        Добавить датчик. Датчик сразу же регистрирует текущее
+        распределение поля.
+        '''
+        probe.addData(self.Ez, self.Hy)
+        self.probes.append(probe)
+
+    def step(self, n: int = 1):
+        '''
+        Выполнить n временных шагов.
+        '''
+        Ez = self.Ez
+        Hy = self.Hy
+        dEz = self._dEz
+        dHy = self._dHy
+        EzInner = self._EzInner
+        lossy = self._lossy
+        mur = self.boundary == 'mur'
+        cpml = bool(self._cpml)
+        timer = self.instrumentation
+
+        for _ in range(n):
+            self.q += 1
+            q = self.q
+            if timer is not None:
+                t = timer.clock()
+
+            # Расчет компоненты поля H
+            numpy.subtract(self._EzRight, self._EzLeft, out=dEz)
+            if cpml:
+                self._applyCPML(dEz, 'H')
+            dEz *= self.chye
+            if lossy:
+                Hy *= self.chyh
+            Hy += dEz
+            if timer is not None:
+                t = timer.record('H', t)
+
+            # Источник возбуждения
+            if self._source is not None:
+                if (self._sourceStart is None
+                        or q >= self._sourceStart + self.sourceBlockSize):
+                    self._fillSourceTables(q)
+                _, indexH, indexE, coefH, coefE = self._source[:5]
+                if self._aux is None:
+                    Hy[indexH] -= self._sourceH[q - self._sourceStart]
+                    Ez[indexE] += self._sourceE[q - self._sourceStart]
+                else:
+                    aux, indexAux = self._aux
+                    Hy[indexH] -= coefH * aux.Ez[indexE]
+                    aux.step()
+                    aux.Ez[indexAux] = self._sourceE[q - self._sourceStart]
+                if timer is not None:
+                    t = timer.record('source', t)
+
+            # Расчет компоненты поля E
+            if self._dispersive:
+                self._updatePolarization()
+            numpy.subtract(self._HyRight, self._HyLeft, out=dHy)
+            if cpml:
+                self._applyCPML(dHy, 'E')
+            dHy *= self._cezhInner
+            if lossy:
+                EzInner *= self._cezeInner
+            EzInner += dHy
+            if self._dispersive:
+                self._applyPolarization()
+            if self._source is not None and self._aux is not None:
+                Ez[indexE] -= coefE * aux.Hy[indexH]
+            if timer is not None:
+                t = timer.record('E', t)
+
+            # Граничные условия
+            if mur:
+                Ez[..., 0] = self.Ez_oldL + self.K_L * (Ez[..., 1] - Ez[..., 0])
+                self.Ez_oldL[...] = Ez[..., 1]
+                Ez[..., -1] = self.Ez_oldR + self.K_R * (Ez[..., -2] - Ez[..., -1])
+                self.Ez_oldR[...] = Ez[..., -2]
+                if timer is not None:
+                    t = timer.record('boundary', t)
+
+            # Регистрация поля в датчиках
+            for probe in self.probes:
+                probe.addData(Ez, Hy)
+            if timer is not None and self.probes:
+                t = timer.record('probes', t)
+
+            if self._checkpoint is not None and q % self._checkpoint[1] == 0:
+                self.saveCheckpoint(self._checkpoint[0])
+                if timer is not None:
+                    timer.record('checkpoint', t)
+
+            if timer is not None:
+                timer.endStep(self)
+
+    def energy(self) -> numpy.ndarray:
+        '''
+        Электромагнитная энергия в расчетной области (с точностью до
+        постоянного множителя): сумма eps * Ez^2 + W0^2 * mu * Hy^2 по
+        всем ячейкам. На неравномерной сетке слагаемые умножаются на
+        длины ячеек (для Ez - на расстояние между соседними узлами Hy).
+        При расчете нескольких конфигураций - массив (nConfigs,).
+        '''
+        if self.uniform:
+            return (numpy.einsum('...i,...i,...i->...', self.eps, self.Ez, self.Ez)
+                    + W0 ** 2 * numpy.einsum('...i,...i,...i->...',
+                                             self.mu, self.Hy, self.Hy))
+
+        return (numpy.einsum('...i,i,...i,...i->...',
+                             self.eps, self._weightE, self.Ez, self.Ez)
+                + W0 ** 2 * numpy.einsum('...i,i,...i,...i->...',
+                                         self.mu, self._weightH, self.Hy, self.Hy))
+
+    def _energyDecayed(self, threshold: float, sourceEnd: int) -> bool:
+        '''
+        Проверить, уменьшилась ли энергия в области (во всех
+        конфигурациях) ниже доли threshold от максимальной после
+        окончания работы источника (шаг sourceEnd).
+        '''
+        energy = self.energy()
+        numpy.maximum(self._energyMax, energy, out=self._energyMax)
+        if self.q < sourceEnd:
+            return False
+        return bool(numpy.all(energy < threshold * self._energyMax))
+
+    def run(self, maxTime: int, display=None, displayStep: int = 1,
+            threshold: float = None, checkStep: int = 100,
+            sourceEnd: int = 0) -> int:
+        '''
+        Выполнить расчет до временного шага maxTime - 1 включительно
+        (датчики при этом содержат maxTime отсчетов).
+
+        display - объект для отображения поля с методом updateData(data, q).
+        displayStep - период обновления отображения (в шагах).
+        threshold - если задан, расчет завершается досрочно, когда энергия
+            в области (см. energy) после шага sourceEnd становится меньше
+            доли threshold от максимальной (например, 1e-6). Проверка
+            выполняется каждые checkStep шагов. Незаполненные отсчеты
+            датчиков остаются равными нулю, поэтому длина сигналов для
+            спектрального анализа не меняется.
+        Возвращает номер последнего рассчитанного шага.
+        '''
+        while self.q < maxTime - 1:
+            if display is None:
+                count = maxTime - 1 - self.q
+                if threshold is not None:
+                    count = min(count, checkStep - self.q % checkStep)
+                self.step(count)
+            else:
+                self.step()
+                if self.q % displayStep == 0:
+                    if self.instrumentation is None:
+                        display.updateData(self.Ez, self.q)
+                    else:
+                        t = self.instrumentation.clock()
+                        display.updateData(self.Ez, self.q)
+                        self.instrumentation.record('display', t)
+
+            if threshold is not None and self.q % checkStep == 0:
+                if self.instrumentation is not None:
+                    t = self.instrumentation.clock()
+                decayed = self._energyDecayed(threshold, sourceEnd)
+                if self.instrumentation is not None:
+                    self.instrumentation.record('energy', t)
+                if decayed:
+                    break
+        return self.q
+
+    def setInstrumentation(self, instrumentation):
+        '''
+        Подключить экземпляр instrumentation.Instrumentation для измерения
+        времени этапов каждого шага (None - отключить).
+        '''
+        self.instrumentation = instrumentation
+
+    def configuration(self) -> dict:
+        '''
+        Полное описание расчета (для ключа кэша результатов, см. модуль
+        cache): параметры области, коэффициенты обновления полей (с учетом
+        изменений после создания объекта), слои CPML, диспергирующие
+        среды, источник и датчики, а также текущее состояние
+        (см. _state).
+        '''
+        arrays, counters = self._state()
+        source = None
+        if self._source is not None:
+            source = (self._source[0], self._source[1:3], self._source[5:],
+                      None if self._aux is None else self._aux[1])
+
+        return {'maxSize': self.maxSize, 'dx': self.dx, 'Sc': self.Sc,
+                'boundary': self.boundary, 'nConfigs': self.nConfigs,
+                'eps': self.eps, 'mu': self.mu,
+                'coefficients': [self.ceze, self.cezh, self.chyh, self.chye,
+                                 self.K_L, self.K_R],
+                'cpml': [region[1:4] + region[6:9] for region in self._cpml],
+                'dispersive': [(region, coefP, [pole[:3] for pole in poles])
+                               for region, coefP, poles, _ in self._dispersive],
+                'source': source,
+                'aux': None if self._aux is None else self._aux[0].configuration(),
+                'probes': [(type(probe).__name__,
+                            {name: value for name, value in vars(probe).items()
+                             if not isinstance(value, numpy.memmap)})
+                           for probe in self.probes],
+                'state': arrays,
+                'counters': {key: getattr(obj, name)
+                             for key, (obj, name) in counters.items()}}
+
+    def setCheckpoint(self, filename: str, period: int):
+        '''
+        Сохранять контрольную точку в файл filename каждые period шагов
+        (см. saveCheckpoint).
+        '''
+        self._checkpoint = (filename, period)
+
+    def _state(self):
+        '''
+        Изменяемое во время расчета состояние: словарь массивов
+        (восстанавливаются на месте) и словарь счетчиков (объект, имя
+        атрибута). Включает поля, значения для граничных условий, слои
+        CPML, поляризацию диспергирующих сред, буферы датчиков и состояние
+        вспомогательной сетки источника.
+        '''
+        arrays = {'Ez': self.Ez, 'Hy': self.Hy,
+                  'Ez_oldL': self.Ez_oldL, 'Ez_oldR': self.Ez_oldR,
+                  'energyMax': self._energyMax}
+        counters = {'q': (self, 'q')}
+
+        for n, region in enumerate(self._cpml):
+            arrays['cpml{}.psiH'.format(n)] = region[4]
+            arrays['cpml{}.psiE'.format(n)] = region[9]
+
+        for n, (_, _, poles, _) in enumerate(self._dispersive):
+            for k, pole in enumerate(poles):
+                arrays['dispersive{}.pole{}.P'.format(n, k)] = pole[3]
+                arrays['dispersive{}.pole{}.Pold'.format(n, k)] = pole[4]
+
+        # Буферы датчиков: все массивы (кроме отображенных в память
+        # файлов) и целочисленные счетчики
+        for n, probe in enumerate(self.probes):
+            for name, value in vars(probe).items():
+                key = 'probe{}.{}'.format(n, name)
+                if isinstance(value, numpy.memmap):
+                    continue
+                if isinstance(value, numpy.ndarray):
+                    arrays[key] = value
+                elif isinstance(value, int) and not isinstance(value, bool):
+                    counters[key] = (probe, name)
+
+        if self._aux is not None:
+            auxArrays, auxCounters = self._aux[0]._state()
+            arrays.update({'aux.' + key: value
+                           for key, value in auxArrays.items()})
+            counters.update({'aux.' + key: value
+                             for key, value in auxCounters.items()})
+
+        return arrays, counters
+
+    def saveCheckpoint(self, filename: str):
+        '''
+        Сохранить полное состояние расчета в файл filename (архив numpy
+        .npz). Файл сначала записывается под уникальным временным именем
+        в той же папке, поэтому прерывание записи не портит предыдущую
+        контрольную точку, а несколько процессов могут записывать один и
+        тот же файл одновременно.
+        Датчики с методом flush (например, tools.SnapshotFile) сбрасывают
+        данные на диск.
+        '''
+        arrays, counters = self._state()
+        data = dict(arrays)
+        data.update({key: numpy.array(getattr(obj, name))
+                     for key, (obj, name) in counters.items()})
+
+        for probe in self.probes:
+            if hasattr(probe, 'flush'):
+                probe.flush()
+
+        handle, temp = tempfile.mkstemp(
+            suffix='.tmp', dir=os.path.dirname(os.path.abspath(filename)))
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                numpy.savez(f, **data)
+            os.replace(temp, filename)
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+    def loadCheckpoint(self, filename: str):
+        '''
+        Восстановить состояние расчета из файла, записанного методом
+        saveCheckpoint. Расчетная область, источник и датчики должны быть
+        созданы так же, как при сохранении; после восстановления расчет
+        продолжается так же, как без перерыва.
+        '''
+        arrays, counters = self._state()
+        with numpy.load(filename) as data:
+            if set(data.files) != set(arrays) | set(counters):
+                raise ValueError('Контрольная точка не соответствует расчетной области')
+            for key, value in arrays.items():
+                if data[key].shape != value.shape:
+                    raise ValueError('Контрольная точка не соответствует расчетной области')
+                value[...] = data[key]
+            for key, (obj, name) in counters.items():
+                setattr(obj, name, int(data[key]))
+
+        # Таблицы источника будут рассчитаны заново с текущего шага
+        self._sourceStart = None
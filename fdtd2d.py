@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+'''
+Модуль с реализацией двумерного метода FDTD (TMz: компоненты Ez, Hx, Hy).
+
+Как и в одномерном решателе (модуль fdtd), все массивы выделяются один
+раз, а поля обновляются на месте. Область разбивается на полосы по оси x,
+которые обновляются параллельно в пуле потоков (универсальные функции
+numpy освобождают GIL при работе с большими массивами). Поля H во всех
+полосах рассчитываются до начала расчета поля E.
+
+Источники (модуль sources) и датчики (модуль tools) используются те же,
+что и в одномерном случае. Датчики регистрируют поля по номеру ячейки в
+развернутом массиве (см. FDTDEngine2D.cellIndex).
+'''
+
+import concurrent.futures
+import os
+
+import numpy
+
+import fdtd
+from fdtd import W0
+
+
+class FDTDEngine2D:
+    '''
+    Класс для расчета распространения ЭМ волны в двумерной области
+    методом FDTD (компоненты Ez, Hx, Hy).
+    Поле Ez имеет размер (nx, ny), Hx - (nx, ny - 1), Hy - (nx - 1, ny).
+    '''
+    # Количество временных шагов, для которых значения источников
+    # рассчитываются за один раз
+    sourceBlockSize = 4096
+
+    def __init__(self, nx: int, ny: int, dx: float,
+                 Sc: float = 1.0 / numpy.sqrt(2.0),
+                 eps=1.0, mu=1.0, loss=0.0, boundary: str = None,
+                 dtype=numpy.float64, threads: int = None):
+        '''
+        nx, ny - размеры области моделирования в отсчетах.
+        dx - размер ячейки разбиения (одинаковый по обеим осям).
+        Sc - число Куранта (не больше 1 / sqrt(2)).
+        eps - относительная диэлектрическая проницаемость (число или массив
+            размером (nx, ny)).
+        mu - относительная магнитная проницаемость (число или массив
+            размером (nx, ny)).
+        loss - потери в среде (число или массив размером (nx, ny)).
+        boundary - тип граничных условий: None - поле Ez на краях равно 0,
+            'mur' - поглощающие граничные условия Мура первого порядка.
+        dtype - тип данных полей (например, numpy.float32).
+        threads - количество потоков (по умолчанию - по числу ядер).
+        '''
+        if boundary not in (None, 'mur'):
+            raise ValueError('Неизвестный тип граничных условий: {}'.format(boundary))
+        if Sc > 1.0 / numpy.sqrt(2.0) + 1e-12:
+            raise ValueError('Число Куранта для двумерной области не должно превышать 1 / sqrt(2)')
+
+        self.nx = nx
+        self.ny = ny
+        self.dx = dx
+        self.Sc = Sc
+        self.dt = Sc * dx / fdtd.c
+        self.boundary = boundary
+        self.dtype = dtype
+
+        # Параметры среды
+        self.eps = numpy.ones((nx, ny)) * eps
+        self.mu = numpy.ones((nx, ny)) * mu
+        self.loss = numpy.ones((nx, ny)) * loss
+
+        # Коэффициенты для расчета полей
+        self.ceze = numpy.empty((nx, ny), dtype=dtype)
+        self.cezh = numpy.empty((nx, ny), dtype=dtype)
+        self.chxh = numpy.empty((nx, ny - 1), dtype=dtype)
+        self.chxe = numpy.empty((nx, ny - 1), dtype=dtype)
+        self.chyh = numpy.empty((nx - 1, ny), dtype=dtype)
+        self.chye = numpy.empty((nx - 1, ny), dtype=dtype)
+        self.updateCoefficients()
+
+        # Поля
+        self.Ez = numpy.zeros((nx, ny), dtype=dtype)
+        self.Hx = numpy.zeros((nx, ny - 1), dtype=dtype)
+        self.Hy = numpy.zeros((nx - 1, ny), dtype=dtype)
+
+        # Развернутые поля для регистрации датчиками. Поля Ez и Hy имеют
+        # одинаковое количество столбцов, поэтому номер ячейки (i, j) в
+        # развернутых массивах совпадает.
+        self._EzFlat = self.Ez.reshape(-1)
+        self._HyFlat = self.Hy.reshape(-1)
+
+        # Разбиение области на полосы по оси x
+        if threads is None:
+            threads = os.cpu_count() or 1
+        threads = max(1, min(threads, nx // 16 or 1))
+        self.threads = threads
+        bounds = numpy.linspace(0, nx, threads + 1).astype(int)
+        self._slabs = [self._slab(start, stop)
+                       for start, stop in zip(bounds[:-1], bounds[1:])]
+        self._pool = (concurrent.futures.ThreadPoolExecutor(threads)
+                      if threads > 1 else None)
+
+        # Граничные условия Мура: коэффициенты и значения поля на
+        # предыдущем шаге для соседних с краями ячеек
+        # (слева, справа, снизу, сверху)
+        self._murEdges = [
+            ((0, slice(None)), (1, slice(None))),
+            ((-1, slice(None)), (-2, slice(None))),
+            ((slice(None), 0), (slice(None), 1)),
+            ((slice(None), -1), (slice(None), -2)),
+        ]
+        self._murK = [self._murCoefficient(self.eps[edge] * self.mu[edge])
+                      for edge, _ in self._murEdges]
+        self._murOld = [numpy.zeros_like(self.Ez[edge])
+                        for edge, _ in self._murEdges]
+
+        # Источники и датчики
+        self._pointSources = []
+        self._planeWave = None
+        self._sourceStart = None
+        self._pointTables = []
+        self.probes = []
+
+        # Номер текущего временного шага
+        self.q = 0
+
+    def updateCoefficients(self):
+        '''
+        Пересчитать коэффициенты обновления полей после изменения eps, mu
+        или loss. Массивы коэффициентов изменяются на месте.
+        '''
+        eps, mu, loss, Sc = self.eps, self.mu, self.loss, self.Sc
+        self.ceze[...] = (1 - loss) / (1 + loss)
+        self.cezh[...] = Sc * W0 / (eps * (1 + loss))
+        self.chxh[...] = (1 - loss[:, :-1]) / (1 + loss[:, :-1])
+        self.chxe[...] = Sc / (W0 * mu[:, :-1] * (1 + loss[:, :-1]))
+        self.chyh[...] = (1 - loss[:-1]) / (1 + loss[:-1])
+        self.chye[...] = Sc / (W0 * mu[:-1] * (1 + loss[:-1]))
+
+        # Если потерь нет, умножение на ceze, chxh и chyh можно пропустить
+        self._lossy = bool(numpy.any(self.ceze != 1))
+
+    def setPEC(self, mask: numpy.ndarray):
+        '''
+        Сделать ячейки, отмеченные в маске mask размером (nx, ny),
+        идеально проводящими (поле Ez в них всегда равно 0).
+        '''
+        self.ceze[mask] = 0
+        self.cezh[mask] = 0
+        self._lossy = True
+
+    def _murCoefficient(self, epsmu) -> numpy.ndarray:
+        '''
+        Коэффициент граничного условия Мура для среды с произведением
+        проницаемостей epsmu.
+        '''
+        k = self.Sc / numpy.sqrt(epsmu)
+        return ((k - 1) / (k + 1)).astype(self.dtype)
+
+    def _slab(self, start: int, stop: int) -> tuple:
+        '''
+        Представления массивов полей и коэффициентов для полосы строк
+        start..stop-1 и вспомогательные массивы для разностей полей.
+        '''
+        Ez, Hx, Hy = self.Ez, self.Hx, self.Hy
+
+        # Поле Hx рассчитывается во всех строках полосы (с обратным
+        # знаком разности поля Ez)
+        hx = (Hx[start:stop], Ez[start:stop, :-1], Ez[start:stop, 1:],
+              self.chxh[start:stop], self.chxe[start:stop],
+              numpy.empty(Hx[start:stop].shape, dtype=self.dtype))
+
+        # Поле Hy - в строках до nx - 2
+        stopH = min(stop, self.nx - 1)
+        hy = (Hy[start:stopH], Ez[start + 1:stopH + 1], Ez[start:stopH],
+              self.chyh[start:stopH], self.chye[start:stopH],
+              numpy.empty(Hy[start:stopH].shape, dtype=self.dtype))
+
+        # Поле Ez - во внутренних ячейках
+        startE = max(start, 1)
+        stopE = min(stop, self.nx - 1)
+        rows = slice(startE, stopE)
+        ez = (Ez[rows, 1:-1],
+              Hy[startE:stopE, 1:-1], Hy[startE - 1:stopE - 1, 1:-1],
+              Hx[rows, 1:], Hx[rows, :-1],
+              self.ceze[rows, 1:-1], self.cezh[rows, 1:-1],
+              numpy.empty(Ez[rows, 1:-1].shape, dtype=self.dtype),
+              numpy.empty(Ez[rows, 1:-1].shape, dtype=self.dtype))
+        return hx, hy, ez
+
+    def _updateH(self, slab: tuple):
+        '''
+        Расчет полей Hx и Hy в полосе.
+        '''
+        lossy = self._lossy
+        for field, plus, minus, chh, che, diff in slab[:2]:
+            if field.size == 0:
+                continue
+            numpy.subtract(plus, minus, out=diff)
+            diff *= che
+            if lossy:
+                field *= chh
+            field += diff
+
+    def _updateE(self, slab: tuple):
+        '''
+        Расчет поля Ez в полосе.
+        '''
+        Ez, HyRight, HyLeft, HxTop, HxBottom, ceze, cezh, diff, diffX = slab[2]
+        if Ez.size == 0:
+            return
+        numpy.subtract(HyRight, HyLeft, out=diff)
+        numpy.subtract(HxTop, HxBottom, out=diffX)
+        diff -= diffX
+        diff *= cezh
+        if self._lossy:
+            Ez *= ceze
+        Ez += diff
+
+    def _map(self, function):
+        '''
+        Выполнить функцию для всех полос (в пуле потоков, если он есть).
+        '''
+        if self._pool is None:
+            for slab in self._slabs:
+                function(slab)
+        else:
+            for _ in self._pool.map(function, self._slabs):
+                pass
+
+    def cellIndex(self, i: int, j: int) -> int:
+        '''
+        Номер ячейки (i, j) в развернутых массивах полей Ez и Hy. Это
+        значение передается в качестве положения датчиков
+        (tools.Probe, tools.ProbeSet). Поле Hy определено только для
+        i < nx - 1, поэтому датчики можно располагать в ячейках с
+        i = 0..nx-2.
+        '''
+        return i * self.ny + j
+
+    def addPointSource(self, source, i: int, j: int):
+        '''
+        Добавить точечный (мягкий) источник - бесконечный линейный ток,
+        параллельный оси z: значение source.getE(0, q) добавляется к полю
+        Ez в ячейке (i, j) на каждом шаге.
+
+        source - источник (см. модуль sources) или любой объект с методом
+            getE(m, q), принимающим массивы numpy.
+        '''
+        self._pointSources.append((source, (i, j)))
+        self._sourceStart = None
+
+    def setPlaneWave(self, source, first, last):
+        '''
+        Установить источник плоской волны, распространяющейся вдоль оси x.
+        Прямоугольник с углами first = (i0, j0) и last = (i1, j1)
+        (включительно) является областью полного поля, остальная часть
+        области - областью рассеянного поля.
+
+        Падающая волна рассчитывается на вспомогательной одномерной сетке
+        (fdtd.FDTDEngine) с параметрами среды в углу first, которую
+        возбуждает жесткий источник. Для волны, распространяющейся вдоль
+        оси сетки, двумерная и одномерная схемы совпадают, поэтому
+        компенсация в области рассеянного поля точная.
+
+        source - источник (см. модуль sources) с числом Куранта Sc.
+        '''
+        (i0, j0), (i1, j1) = first, last
+        if not (0 < i0 < i1 < self.nx - 1 and 0 < j0 < j1 < self.ny - 1):
+            raise ValueError('Неверные границы области полного поля')
+
+        aux = fdtd.FDTDEngine(self.nx, self.dx, self.Sc,
+                              self.eps[i0, j0], self.mu[i0, j0],
+                              boundary='cpml')
+        if i0 - 2 <= len(aux._cpml[0][1]):
+            raise ValueError('Область полного поля расположена слишком близко к краю области')
+
+        rows = slice(i0, i1 + 1)
+        columns = slice(j0, j1 + 1)
+        # Поправки к полям H и E на границах прямоугольника:
+        # (поле, срез поля, коэффициент, знак, срез поля вспомогательной сетки)
+        self._planeWaveH = [
+            (self.Hy, (i0 - 1, columns), self.chye[i0 - 1, columns], -1, i0),
+            (self.Hy, (i1, columns), self.chye[i1, columns], 1, i1),
+            (self.Hx, (rows, j0 - 1), self.chxe[rows, j0 - 1], 1, rows),
+            (self.Hx, (rows, j1), self.chxe[rows, j1], -1, rows),
+        ]
+        self._planeWaveE = [
+            ((i0, columns), self.cezh[i0, columns], -1, i0 - 1),
+            ((i1, columns), self.cezh[i1, columns], 1, i1),
+        ]
+        self._planeWave = (source, aux, i0 - 2)
+        self._sourceStart = None
+
+    def addIncidentProbe(self, probe):
+        '''
+        Добавить датчик, регистрирующий только падающую волну (положение
+        датчика - номер ячейки по оси x).
+        '''
+        if self._planeWave is None:
+            raise ValueError('Источник плоской волны не установлен')
+        self._planeWave[1].addProbe(probe)
+
+    def _fillSourceTables(self, q: int):
+        '''
+        Рассчитать значения источников для шагов q..q+sourceBlockSize-1.
+        '''
+        times = numpy.arange(q, q + self.sourceBlockSize, dtype=float)
+        self._pointTables = [source.getE(0, times).astype(self.dtype)
+                             for source, _ in self._pointSources]
+        if self._planeWave is not None:
+            self._planeWaveTable = self._planeWave[0].getE(0, times)
+        self._sourceStart = q
+
+    def addProbe(self, probe):
+        '''
+        Добавить датчик (положение - номер ячейки, см. cellIndex).
+        Датчик сразу же регистрирует текущее распределение поля.
+        '''
+        positions = getattr(probe, 'positions', getattr(probe, 'position', 0))
+        if not 0 <= numpy.min(positions) <= numpy.max(positions) < len(self._HyFlat):
+            raise ValueError('Датчик должен находиться в ячейке с i от 0 до nx - 2')
+        probe.addData(self._EzFlat, self._HyFlat)
+        self.probes.append(probe)
+
+    def step(self, n: int = 1):
+        '''
+        Выполнить n временных шагов.
+        '''
+        Ez = self.Ez
+        mur = self.boundary == 'mur'
+        planeWave = self._planeWave is not None
+        sources = bool(self._pointSources) or planeWave
+
+        for _ in range(n):
+            self.q += 1
+            q = self.q
+
+            if sources and (self._sourceStart is None
+                            or q >= self._sourceStart + self.sourceBlockSize):
+                self._fillSourceTables(q)
+
+            # Расчет компонент поля H
+            self._map(self._updateH)
+
+            # Плоская волна: поправки полей H на границе области полного
+            # поля, затем шаг вспомогательной сетки
+            if planeWave:
+                _, aux, index = self._planeWave
+                for field, cells, coef, sign, auxCells in self._planeWaveH:
+                    field[cells] += sign * coef * aux.Ez[auxCells]
+                aux.step()
+                aux.Ez[index] = self._planeWaveTable[q - self._sourceStart]
+
+            # Расчет компоненты поля E
+            self._map(self._updateE)
+
+            if planeWave:
+                for cells, coef, sign, auxCells in self._planeWaveE:
+                    Ez[cells] += sign * coef * aux.Hy[auxCells]
+
+            for (source, cell), table in zip(self._pointSources,
+                                             self._pointTables):
+                Ez[cell] += table[q - self._sourceStart]
+
+            # Граничные условия
+            if mur:
+                for (edge, inner), K, old in zip(self._murEdges, self._murK,
+                                                 self._murOld):
+                    Ez[edge] = old + K * (Ez[inner] - Ez[edge])
+                    old[...] = Ez[inner]
+
+            # Регистрация поля в датчиках
+            for probe in self.probes:
+                probe.addData(self._EzFlat, self._HyFlat)
+
+    def run(self, maxTime: int, display=None, displayStep: int = 1):
+        '''
+        Выполнить расчет до временного шага maxTime - 1 включительно
+        (датчики при этом содержат maxTime отсчетов).
+
+        display - объект для отображения поля с методом updateData(data, q).
+        displayStep - период обновления отображения (в шагах).
+        '''
+        while self.q < maxTime - 1:
+            if display is None:
+                self.step(maxTime - 1 - self.q)
+            else:
+                self.step()
+                if self.q % displayStep == 0:
+                    display.updateData(self.Ez, self.q)
+
+    def close(self):
+        '''
+        Остановить пул потоков.
+        '''
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
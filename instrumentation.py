@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+'''
+Модуль для измерения времени выполнения этапов временного цикла FDTD.
+
+Экземпляр Instrumentation подключается к расчетной области
+(fdtd.FDTDEngine.setInstrumentation) и накапливает время и количество
+выполнений каждого этапа шага (расчет H, источник, расчет E, граничные
+условия, датчики, отображение, контрольные точки). Без подключенного
+экземпляра цикл выполняет только проверку на None перед каждым этапом.
+
+Результаты можно получить в виде сводки (summary, saveSummary) или
+записать трассу выполнения в формате Trace Event JSON (saveTrace), который
+открывается в chrome://tracing и Perfetto.
+'''
+
+import json
+import time
+
+
+class Instrumentation:
+    '''
+    Класс для накопления времени и количества выполнений этапов расчета.
+    '''
+    def __init__(self, trace: bool = False, traceLimit: int = 1000000):
+        '''
+        trace - сохранять каждое выполнение этапа для записи трассы.
+        traceLimit - максимальное количество сохраняемых событий трассы.
+        '''
+        self.trace = trace
+        self.traceLimit = traceLimit
+        self.callbacks = []
+        self.reset()
+
+    def reset(self):
+        '''
+        Сбросить накопленные данные.
+        '''
+        self.times = {}
+        self.counts = {}
+        self.steps = 0
+        self.events = []
+        self._origin = time.perf_counter()
+
+    def addCallback(self, function, period: int):
+        '''
+        Вызывать function(engine, instrumentation) после каждого шага,
+        номер которого кратен period.
+        '''
+        self.callbacks.append((period, function))
+
+    def clock(self) -> float:
+        '''
+        Текущее время (начало очередного этапа).
+        '''
+        return time.perf_counter()
+
+    def record(self, stage: str, start: float) -> float:
+        '''
+        Учесть выполнение этапа stage, начавшегося в момент start.
+        Возвращает текущее время (начало следующего этапа).
+        '''
+        now = time.perf_counter()
+        self.times[stage] = self.times.get(stage, 0.0) + now - start
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+        if self.trace and len(self.events) < self.traceLimit:
+            self.events.append((stage, start, now - start))
+        return now
+
+    def endStep(self, engine):
+        '''
+        Завершение временного шага расчетной области engine.
+        '''
+        self.steps += 1
+        for period, function in self.callbacks:
+            if engine.q % period == 0:
+                function(engine, self)
+
+    def summary(self) -> dict:
+        '''
+        Сводка по этапам: суммарное время (с), количество выполнений,
+        среднее время выполнения (с) и доля от суммарного времени всех
+        этапов.
+        '''
+        total = sum(self.times.values())
+        return {'steps': self.steps,
+                'total': total,
+                'stages': {stage: {'time': value,
+                                   'count': self.counts[stage],
+                                   'mean': value / self.counts[stage],
+                                   'fraction': value / total if total else 0.0}
+                           for stage, value in self.times.items()}}
+
+    def saveSummary(self, filename: str):
+        '''
+        Записать сводку по этапам в файл JSON.
+        '''
+        with open(filename, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def saveTrace(self, filename: str):
+        '''
+        Записать трассу выполнения этапов (только при trace=True) в
+        формате Trace Event JSON. Время в микросекундах от создания
+        экземпляра или последнего вызова reset.
+        '''
+        events = [{'name': stage, 'ph': 'X', 'pid': 0, 'tid': 0,
+                   'ts': (start - self._origin) * 1e6,
+                   'dur': duration * 1e6}
+                  for stage, start, duration in self.events]
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': events}, f)
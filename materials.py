@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+'''
+Модуль с моделями диспергирующих сред (Дебая, Друде, Лоренца) для
+метода FDTD.
+
+Каждая модель (полюс) описывает вклад в поляризацию среды, который
+рассчитывается методом вспомогательных дифференциальных уравнений (ADE).
+Для всех моделей используется одна и та же явная разностная схема для
+нормированной поляризации P' = P / eps0:
+
+    P'(n+1) = C1 * P'(n) + C2 * P'(n-1) + C3 * E(n),
+
+поэтому в решателе все полюса обновляются одинаково (см.
+fdtd.FDTDEngine.addDispersiveMaterial). Множитель по времени -
+exp(j omega t).
+'''
+
+from typing import List
+
+import numpy
+
+
+class DebyePole:
+    '''
+    Полюс Дебая: tau dP/dt + P = eps0 deltaEps E.
+    deltaEps - изменение диэлектрической проницаемости.
+    tau - время релаксации, с.
+    '''
+    def __init__(self, deltaEps: float, tau: float):
+        self.deltaEps = deltaEps
+        self.tau = tau
+
+    def coefficients(self, dt: float):
+        '''
+        Коэффициенты C1, C2, C3 разностной схемы для шага по времени dt
+        '''
+        k = dt / (2 * self.tau)
+        return ((1 - k) / (1 + k), 0.0,
+                self.deltaEps * (dt / self.tau) / (1 + k))
+
+    def epsilon(self, omega):
+        '''
+        Вклад в комплексную диэлектрическую проницаемость на круговой
+        частоте omega
+        '''
+        return self.deltaEps / (1 + 1j * omega * self.tau)
+
+
+class LorentzPole:
+    '''
+    Полюс Лоренца: d2P/dt2 + gamma dP/dt + omega0^2 P = eps0 deltaEps omega0^2 E.
+    deltaEps - изменение диэлектрической проницаемости.
+    omega0 - резонансная круговая частота, рад/с.
+    gamma - коэффициент затухания, 1/с.
+    '''
+    def __init__(self, deltaEps: float, omega0: float, gamma: float):
+        self.deltaEps = deltaEps
+        self.omega0 = omega0
+        self.gamma = gamma
+
+    def _drive(self) -> float:
+        '''
+        Множитель при E в правой части уравнения (без eps0)
+        '''
+        return self.deltaEps * self.omega0 ** 2
+
+    def coefficients(self, dt: float):
+        '''
+        Коэффициенты C1, C2, C3 разностной схемы для шага по времени dt
+        '''
+        k = self.gamma * dt / 2
+        return ((2 - self.omega0 ** 2 * dt ** 2) / (1 + k),
+                (k - 1) / (1 + k),
+                self._drive() * dt ** 2 / (1 + k))
+
+    def epsilon(self, omega):
+        '''
+        Вклад в комплексную диэлектрическую проницаемость на круговой
+        частоте omega
+        '''
+        return self._drive() / (self.omega0 ** 2 - omega ** 2
+                                + 1j * self.gamma * omega)
+
+
+class DrudePole(LorentzPole):
+    '''
+    Полюс Друде: d2P/dt2 + gamma dP/dt = eps0 omegaP^2 E.
+    omegaP - плазменная круговая частота, рад/с.
+    gamma - частота столкновений, 1/с.
+    '''
+    def __init__(self, omegaP: float, gamma: float):
+        super().__init__(0.0, 0.0, gamma)
+        self.omegaP = omegaP
+
+    def _drive(self) -> float:
+        return self.omegaP ** 2
+
+
+class DispersiveMaterial:
+    '''
+    Диспергирующая среда: проницаемость на бесконечной частоте и набор
+    полюсов.
+    '''
+    def __init__(self, epsInf: float, poles: List):
+        '''
+        epsInf - диэлектрическая проницаемость на бесконечной частоте.
+        poles - список полюсов (DebyePole, DrudePole, LorentzPole).
+        '''
+        self.epsInf = epsInf
+        self.poles = list(poles)
+
+    def epsilon(self, frequencies) -> numpy.ndarray:
+        '''
+        Комплексная диэлектрическая проницаемость на частотах frequencies, Гц
+        '''
+        omega = 2 * numpy.pi * numpy.asarray(frequencies, dtype=float)
+        eps = numpy.full(omega.shape, self.epsInf, dtype=complex)
+        for pole in self.poles:
+            eps += pole.epsilon(omega)
+        return eps
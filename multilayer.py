@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+'''
+Модуль для аналитического расчета коэффициента отражения плоской волны
+от многослойной диэлектрической структуры методом матриц передачи
+(нормальное падение).
+
+Структура описывается так же, как в Task4: проницаемости слоев eps и их
+толщины d, слева от структуры находится среда с проницаемостью epsIn, из
+которой падает волна, справа - полубесконечная среда с проницаемостью
+epsOut. Расчет векторизован по частотам и по наборам структур: eps и d
+могут иметь размер (количество структур, количество слоев).
+'''
+
+import numpy
+
+from fdtd import c
+
+
+def reflection(frequencies, eps, d, epsIn=1.0, epsOut=1.0,
+               mu=1.0, muIn=1.0, muOut=1.0) -> numpy.ndarray:
+    '''
+    Комплексный коэффициент отражения многослойной структуры.
+
+    frequencies - частоты, Гц (массив длиной nF).
+    eps - проницаемости слоев, массив (..., nLayers).
+    d - толщины слоев в м, массив (..., nLayers).
+    epsIn, epsOut - проницаемости сред слева и справа от структуры
+        (числа или массивы (...)).
+    mu, muIn, muOut - соответствующие магнитные проницаемости.
+    Возвращает массив (..., nF).
+    '''
+    frequencies = numpy.asarray(frequencies, dtype=float)
+    eps = numpy.asarray(eps, dtype=complex)
+    d = numpy.asarray(d, dtype=float)
+    mu = numpy.broadcast_to(numpy.asarray(mu, dtype=complex), eps.shape)
+
+    # Волновое число в вакууме
+    k0 = 2 * numpy.pi * frequencies / c
+
+    # Волновые проводимости сред (нормированные к вакууму)
+    etaIn = numpy.sqrt(numpy.asarray(epsIn, dtype=complex) / muIn)[..., None]
+    etaOut = numpy.sqrt(numpy.asarray(epsOut, dtype=complex) / muOut)[..., None]
+
+    # Вектор (B, C) = M1 * M2 * ... * Mn * (1, etaOut) вычисляется
+    # справа налево, поэтому матрицы всех слоев не перемножаются
+    shape = numpy.broadcast_shapes(eps.shape[:-1] + (len(frequencies),),
+                                   etaOut.shape)
+    B = numpy.ones(shape, dtype=complex)
+    C = etaOut * B
+
+    for n in reversed(range(eps.shape[-1])):
+        index = numpy.sqrt(eps[..., n] * mu[..., n])[..., None]
+        eta = numpy.sqrt(eps[..., n] / mu[..., n])[..., None]
+        delta = k0 * index * d[..., n, None]
+        cos = numpy.cos(delta)
+        sin = numpy.sin(delta)
+        B, C = cos * B + 1j * sin / eta * C, 1j * eta * sin * B + cos * C
+
+    return (etaIn * B - C) / (etaIn * B + C)
+
+
+def layersFromProfile(eps: numpy.ndarray, dx: float):
+    '''
+    Получить описание слоев по распределению проницаемости в области
+    моделирования (например, массиву eps из Task4).
+
+    eps - относительная диэлектрическая проницаемость в ячейках.
+    dx - размер ячейки разбиения.
+    Возвращает epsIn, проницаемости и толщины внутренних слоев, epsOut.
+    '''
+    eps = numpy.asarray(eps)
+    bounds = numpy.flatnonzero(numpy.diff(eps)) + 1
+    starts = numpy.concatenate(([0], bounds))
+    ends = numpy.concatenate((bounds, [len(eps)]))
+
+    layersEps = eps[starts[1:-1]]
+    layersD = (ends[1:-1] - starts[1:-1]) * dx
+    return eps[0], layersEps, layersD, eps[-1]
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+'''
+Модуль для автоматического выбора параметров одномерной расчетной
+области по описанию слоистой структуры.
+
+Структура описывается так же, как в модуле multilayer: проницаемости
+слоев eps и их толщины d, среда epsIn слева от структуры (из нее падает
+волна) и полубесконечная среда epsOut справа. По максимальной частоте и
+требуемому количеству ячеек на минимальную длину волны выбирается шаг dx,
+при котором границы слоев совпадают с границами ячеек (толщины слоев
+округляются с относительной погрешностью не больше tolerance). Если
+немного меньший шаг (не больше чем на долю tolerance) передает толщины
+точнее, выбирается он.
+
+Функция planGradedGrid строит неравномерную сетку: мелкие ячейки
+используются только внутри слоев, а в окружающих средах размер ячеек
+плавно (в геометрической прогрессии) увеличивается до размера,
+достаточного для этих сред.
+'''
+
+import math
+
+import numpy
+
+from fdtd import c
+
+# Минимальное количество ячеек слева от источника на неравномерной сетке
+# (для граничного условия и датчика отраженной волны)
+minPadding = 20
+
+# Максимальное количество проверяемых размеров ячейки при подборе шага,
+# при котором границы слоев совпадают с границами ячеек
+maxCandidates = 100000
+
+
+class GridPlan:
+    '''
+    Параметры расчетной области, выбранные функцией planGrid.
+
+    dx - размер ячейки, м.
+    Sc - число Куранта.
+    dt - шаг по времени, с.
+    maxSize - размер области моделирования в отсчетах.
+    maxTime - время расчета в отсчетах.
+    boundaries - номера ячеек, с которых начинаются слои (и последний
+        элемент - номер ячейки, с которой начинается среда epsOut).
+    cells - размеры ячеек (массив длиной maxSize - 1), только для
+        неравномерной сетки; передается в fdtd.FDTDEngine вместо dx.
+    thicknesses - толщины слоев после округления, м.
+    eps - массив проницаемостей длиной maxSize.
+    mu - массив магнитных проницаемостей длиной maxSize - 1.
+    sourcePos - положение источника (номер ячейки).
+    width, delay - параметры гауссова импульса (в отсчетах) для
+        sources.GaussianPlaneWave, спектр которого на частоте fmax равен
+        доле level от максимума.
+    '''
+    def __init__(self, **params):
+        self.__dict__.update(params)
+
+
+def _snap(d: numpy.ndarray, dxMax: float, tolerance: float) -> float:
+    '''
+    Шаг dx <= dxMax, при котором толщины всех слоев d отличаются от
+    целого числа ячеек (не меньше одной) не больше, чем на долю
+    tolerance. Из шагов, которые не больше чем на долю tolerance меньше
+    наибольшего подходящего, выбирается шаг с наименьшей погрешностью
+    толщин (при равной погрешности - наибольший), поэтому соизмеримые
+    толщины передаются точно.
+    '''
+    if len(d) == 0:
+        return dxMax
+
+    # Каждый слой содержит хотя бы одну ячейку, поэтому подходящий шаг
+    # не больше толщины самого тонкого слоя (с учетом tolerance)
+    dxMax = min(dxMax, d.min() * (1 + tolerance))
+
+    # Кандидаты: шаги, при которых один из слоев состоит ровно из n
+    # ячеек. Перебираются по убыванию.
+    counts = numpy.ceil(d / dxMax * (1 - 1e-12)).astype(int)
+    best = None
+    dxMin = 0.0
+    for _ in range(maxCandidates):
+        candidates = d / counts
+        dx = candidates.max()
+        if dx < dxMin:
+            return best[1]
+
+        cells = numpy.maximum(numpy.round(d / dx), 1)
+        error = numpy.max(numpy.abs(cells * dx - d) / d)
+        if error <= tolerance:
+            if best is None:
+                dxMin = dx * (1 - tolerance)
+            if best is None or error < best[0] * (1 - 1e-9) - 1e-12:
+                best = (error, dx)
+        counts[candidates.argmax()] += 1
+
+    if best is None:
+        raise ValueError('Не удалось подобрать размер ячейки для толщин слоев '
+                         '(увеличьте tolerance)')
+    return best[1]
+
+
+def planGrid(eps, d, fmax: float, cellsPerWavelength: float = 20,
+             epsIn: float = 1.0, epsOut: float = 1.0,
+             mu=1.0, muIn: float = 1.0, muOut: float = 1.0,
+             Sc: float = 1.0, tolerance: float = 0.01,
+             padding: int = 50, outside: float = None,
+             level: float = 0.1, transits: float = 4.0) -> GridPlan:
+    '''
+    Выбрать параметры расчетной области.
+
+    eps - проницаемости слоев.
+    d - толщины слоев, м.
+    fmax - максимальная частота, на которой нужен результат, Гц.
+    cellsPerWavelength - количество ячеек на минимальную длину волны
+        (длина волны на частоте fmax в среде с наибольшим показателем
+        преломления).
+    epsIn, epsOut, mu, muIn, muOut - проницаемости сред слева и справа от
+        структуры и магнитные проницаемости слоев.
+    Sc - число Куранта (для одномерной области устойчивость при Sc <= 1).
+    tolerance - допустимая относительная погрешность толщины слоя после
+        округления до целого числа ячеек.
+    padding - количество ячеек слева от источника (для датчика
+        отраженной волны и граничного условия) и между источником и
+        структурой.
+    outside - толщина области со средой epsOut справа от структуры, м
+        (по умолчанию - одна максимальная длина волны, но не меньше
+        padding ячеек).
+    level - уровень спектра импульса на частоте fmax относительно
+        максимума.
+    transits - во сколько раз время расчета после окончания импульса
+        больше времени распространения волны через всю область. Для
+        структур с многократными отражениями время может оказаться
+        недостаточным, поэтому maxTime лучше использовать вместе с
+        досрочным завершением расчета (FDTDEngine.run с параметром
+        threshold).
+    '''
+    if Sc > 1:
+        raise ValueError('Число Куранта для одномерной области не должно превышать 1')
+
+    eps = numpy.atleast_1d(numpy.asarray(eps, dtype=float))
+    d = numpy.atleast_1d(numpy.asarray(d, dtype=float))
+    mu = numpy.broadcast_to(numpy.asarray(mu, dtype=float), eps.shape)
+    if eps.shape != d.shape:
+        raise ValueError('Количество проницаемостей и толщин слоев должно совпадать')
+    if not numpy.all(d > 0):
+        raise ValueError('Толщины слоев должны быть положительными')
+
+    # Минимальная длина волны и размер ячейки
+    index = numpy.sqrt(numpy.concatenate(([epsIn * muIn, epsOut * muOut],
+                                          eps * mu)))
+    lambdaMin = c / (fmax * index.max())
+    dx = _snap(d, lambdaMin / cellsPerWavelength, tolerance)
+    dt = Sc * dx / c
+
+    # Расположение слоев
+    cells = numpy.maximum(numpy.round(d / dx), 1).astype(int)
+    start = 2 * padding
+    boundaries = start + numpy.concatenate(([0], numpy.cumsum(cells)))
+    if outside is None:
+        outside = c / (fmax * index.min())
+    maxSize = int(boundaries[-1] + max(padding, math.ceil(outside / dx)))
+
+    epsArray = numpy.full(maxSize, float(epsIn))
+    muArray = numpy.full(maxSize, float(muIn))
+    for n in range(len(eps)):
+        epsArray[boundaries[n]:boundaries[n + 1]] = eps[n]
+        muArray[boundaries[n]:boundaries[n + 1]] = mu[n]
+    epsArray[boundaries[-1]:] = epsOut
+    muArray[boundaries[-1]:] = muOut
+
+    # Гауссов импульс exp(-((q - delay) / width)^2): спектр
+    # exp(-(pi f width dt)^2) на частоте fmax равен level
+    width = math.sqrt(math.log(1 / level)) / (math.pi * fmax * dt)
+    delay = 3 * width
+
+    # Время расчета: импульс и transits проходов волны через область
+    cellTime = numpy.sqrt(epsArray[:-1] * muArray[:-1]).sum() / Sc
+    maxTime = int(math.ceil(delay + 3 * width + transits * cellTime))
+
+    return GridPlan(dx=dx, Sc=Sc, dt=dt, maxSize=maxSize, maxTime=maxTime,
+                    boundaries=boundaries, thicknesses=cells * dx,
+                    eps=epsArray, mu=muArray[:-1], sourcePos=padding,
+                    width=width, delay=delay)
+
+
+def _graded(start: float, stop: float, ratio: float) -> list:
+    '''
+    Размеры ячеек переходной области, увеличивающиеся от start (не
+    включая) до stop (не включая) в ratio раз на каждой ячейке.
+    '''
+    sizes = []
+    size = start * ratio
+    while size < stop:
+        sizes.append(size)
+        size *= ratio
+    return sizes
+
+
+def planGradedGrid(eps, d, fmax: float, cellsPerWavelength: float = 20,
+                   epsIn: float = 1.0, epsOut: float = 1.0,
+                   mu=1.0, muIn: float = 1.0, muOut: float = 1.0,
+                   Sc: float = 1.0, ratio: float = 1.05,
+                   padding: int = 50, outside: float = None,
+                   level: float = 0.1, transits: float = 4.0) -> GridPlan:
+    '''
+    Выбрать параметры неравномерной расчетной области. Параметры такие
+    же, как у функции planGrid, кроме:
+
+    ratio - максимальное отношение размеров соседних ячеек в переходных
+        областях.
+    padding - длина областей слева от источника и между источником и
+        структурой в ячейках слоев (как у planGrid); слева от источника -
+        не меньше minPadding ячеек.
+
+    Каждый слой разбивается на целое число одинаковых ячеек размером не
+    больше минимальной длины волны в слоях, деленной на
+    cellsPerWavelength, поэтому границы слоев точно совпадают с границами
+    ячеек. В средах epsIn и epsOut размер ячеек плавно увеличивается до
+    длины волны в этих средах, деленной на cellsPerWavelength; источник и
+    датчики находятся в области одинаковых ячеек. Шаг по времени
+    определяется самой маленькой ячейкой.
+
+    Количество ячеек заметно уменьшается, если слои требуют ячеек намного
+    мельче, чем окружающие среды (например, тонкие пленки в большой
+    области), и почти не меняется, если большая часть области занята
+    слоями (как в Task4).
+    '''
+    if Sc > 1:
+        raise ValueError('Число Куранта для одномерной области не должно превышать 1')
+
+    eps = numpy.atleast_1d(numpy.asarray(eps, dtype=float))
+    d = numpy.atleast_1d(numpy.asarray(d, dtype=float))
+    mu = numpy.broadcast_to(numpy.asarray(mu, dtype=float), eps.shape)
+    if eps.shape != d.shape:
+        raise ValueError('Количество проницаемостей и толщин слоев должно совпадать')
+    if not numpy.all(d > 0):
+        raise ValueError('Толщины слоев должны быть положительными')
+
+    def cellSize(epsmu):
+        return c / (fmax * numpy.sqrt(epsmu) * cellsPerWavelength)
+
+    # Ячейки слоев
+    hLayers = cellSize((eps * mu).max()) if len(eps) else cellSize(epsIn * muIn)
+    counts = numpy.ceil(d / hLayers * (1 - 1e-12)).astype(int)
+    layerCells = [numpy.full(n, thickness / n) for n, thickness in zip(counts, d)]
+    hFirst = layerCells[0][0] if layerCells else hLayers
+    hLast = layerCells[-1][-1] if layerCells else hLayers
+
+    # Области слева и справа от структуры с переходными ячейками. Длины
+    # областей такие же, как у равномерной сетки с ячейками слоев
+    # (padding ячеек), поэтому крупные ячейки уменьшают их размер в
+    # ячейках, а не увеличивают область
+    hIn = cellSize(epsIn * muIn)
+    hOut = cellSize(epsOut * muOut)
+    left = _graded(hFirst, hIn, ratio)[::-1]
+    right = _graded(hLast, hOut, ratio)
+    gap = padding * min(hFirst, hLast)
+    if outside is None:
+        outside = c / (fmax * math.sqrt(min(epsIn * muIn, epsOut * muOut)))
+    sourcePos = max(minPadding, math.ceil(gap / hIn))
+    gapCount = max(1, math.ceil((gap - sum(left)) / hIn))
+    outsideCount = max(1, math.ceil((max(outside, gap) - sum(right)) / hOut))
+
+    cells = numpy.concatenate([numpy.full(sourcePos + gapCount, hIn), left]
+                              + layerCells
+                              + [right, numpy.full(outsideCount, hOut)])
+    maxSize = len(cells) + 1
+    start = sourcePos + gapCount + len(left)
+    boundaries = start + numpy.concatenate(([0], numpy.cumsum(counts)))
+
+    epsArray = numpy.full(maxSize, float(epsIn))
+    muArray = numpy.full(maxSize, float(muIn))
+    for n in range(len(eps)):
+        epsArray[boundaries[n]:boundaries[n + 1]] = eps[n]
+        muArray[boundaries[n]:boundaries[n + 1]] = mu[n]
+    epsArray[boundaries[-1]:] = epsOut
+    muArray[boundaries[-1]:] = muOut
+
+    dt = Sc * cells.min() / c
+
+    # Гауссов импульс (как в planGrid)
+    width = math.sqrt(math.log(1 / level)) / (math.pi * fmax * dt)
+    delay = 3 * width
+
+    # Время распространения волны через область в шагах
+    cellTime = (numpy.sqrt(epsArray[:-1] * muArray[:-1]) * cells).sum() / (c * dt)
+    maxTime = int(math.ceil(delay + 3 * width + transits * cellTime))
+
+    return GridPlan(dx=hIn, cells=cells, Sc=Sc, dt=dt, maxSize=maxSize,
+                    maxTime=maxTime, boundaries=boundaries,
+                    thicknesses=numpy.array([layer.sum() for layer in layerCells]),
+                    eps=epsArray, mu=muArray[:-1], sourcePos=sourcePos,
+                    width=width, delay=delay)
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+'''
+Модуль для расчета эффективной площади рассеяния (ЭПР) идеально
+проводящей сферы (ряд Ми).
+
+Все члены ряда рассчитываются сразу в виде двумерного массива
+(номер члена ряда x значение kr). Количество членов ряда выбирается для
+каждого kr по критерию Вискомба, а сферические функции Бесселя
+рассчитываются с помощью рекуррентных соотношений: функции второго рода -
+прямой рекурсией, функции первого рода - обратной рекурсией (метод
+Миллера). Значения kr обрабатываются блоками, размер которых выбирается
+так, чтобы таблицы содержали не больше elementBudget элементов. Таблицы
+функций Бесселя кэшируются для повторяющихся сеток kr.
+'''
+
+import collections
+import math
+
+import numpy
+
+# Максимальное количество элементов в таблице функций Бесселя для одного
+# блока значений kr (количество членов ряда x количество значений kr)
+elementBudget = 1 << 20
+
+# Максимальный суммарный размер таблиц функций Бесселя в кэше, байт
+cacheBytes = 64 << 20
+
+_besselCache = collections.OrderedDict()
+
+
+def termsCount(kr) -> numpy.ndarray:
+    '''
+    Количество членов ряда Ми, необходимое для сходимости (критерий
+    Вискомба).
+    '''
+    kr = numpy.asarray(kr, dtype=float)
+    root = numpy.cbrt(kr)
+    n = numpy.where(kr <= 8, kr + 4 * root + 1,
+                    numpy.where(kr < 4200, kr + 4.05 * root + 2,
+                                kr + 4 * root + 2))
+    return numpy.ceil(n).astype(int)
+
+
+def _besselTables(kr: numpy.ndarray, nMax: int):
+    '''
+    Сферические функции Бесселя первого и второго рода порядков
+    0..nMax для всех значений kr. Возвращает два массива размером
+    (nMax + 1, len(kr)).
+    '''
+    count = len(kr)
+    J = numpy.empty((nMax + 1, count))
+    Y = numpy.empty((nMax + 1, count))
+
+    sin = numpy.sin(kr)
+    cos = numpy.cos(kr)
+
+    # Функции второго рода: прямая рекурсия устойчива
+    Y[0] = -cos / kr
+    if nMax > 0:
+        Y[1] = -cos / kr ** 2 - sin / kr
+    with numpy.errstate(over='ignore', invalid='ignore'):
+        for n in range(1, nMax):
+            Y[n + 1] = (2 * n + 1) / kr * Y[n] - Y[n - 1]
+
+    # Функции первого рода: обратная рекурсия (метод Миллера), начиная с
+    # порядка, где функции заведомо малы. Чтобы избежать переполнения,
+    # растущие значения периодически масштабируются.
+    nStart = nMax + 15 + int(math.sqrt(numpy.max(kr)))
+    fNext = numpy.zeros(count)
+    f = numpy.full(count, 1e-300)
+    for n in range(nStart, 0, -1):
+        fPrev = (2 * n + 1) / kr * f - fNext
+        big = numpy.abs(fPrev) > 1e150
+        if big.any():
+            fPrev[big] *= 1e-150
+            f[big] *= 1e-150
+            J[n:, big] *= 1e-150
+        fNext, f = f, fPrev
+        if n - 1 <= nMax:
+            J[n - 1] = f
+
+    # Нормировка по j_0 или j_1 (по той из них, что больше по модулю)
+    j0 = sin / kr
+    j1 = sin / kr ** 2 - cos / kr
+    J *= numpy.where(numpy.abs(j0) >= numpy.abs(j1), j0 / J[0], j1 / J[1])
+
+    return J, Y
+
+
+def besselTables(kr, nMax: int):
+    '''
+    Кэшированные таблицы сферических функций Бесселя (см. _besselTables).
+    '''
+    kr = numpy.ascontiguousarray(kr, dtype=float)
+    key = (kr.tobytes(), nMax)
+    if key in _besselCache:
+        _besselCache.move_to_end(key)
+        return _besselCache[key]
+
+    tables = _besselTables(kr, nMax)
+    for table in tables:
+        table.flags.writeable = False
+
+    _besselCache[key] = tables
+    total = sum(J.nbytes + Y.nbytes for J, Y in _besselCache.values())
+    while total > cacheBytes:
+        _, (J, Y) = _besselCache.popitem(last=False)
+        total -= J.nbytes + Y.nbytes
+    return tables
+
+
+def _chunks(nTerms: numpy.ndarray):
+    '''
+    Разбить значения kr с количествами членов ряда nTerms на блоки
+    (срезы), для которых таблицы функций Бесселя содержат не больше
+    elementBudget элементов (блок содержит хотя бы одно значение).
+    '''
+    start = 0
+    while start < len(nTerms):
+        # Размер таблиц для блоков из 1, 2, ... значений kr (блок не
+        # длиннее, чем позволяет количество членов ряда для первого kr)
+        head = nTerms[start:start + max(1, elementBudget // (int(nTerms[start]) + 1))]
+        sizes = (numpy.maximum.accumulate(head) + 1) * numpy.arange(1, len(head) + 1)
+        count = max(1, int(numpy.searchsorted(sizes, elementBudget, side='right')))
+        yield slice(start, start + count)
+        start += count
+
+
+def _seriesSum(kr: numpy.ndarray) -> numpy.ndarray:
+    '''
+    Сумма ряда Ми для обратного рассеяния на идеально проводящей сфере.
+    '''
+    nTerms = termsCount(kr)
+    nMax = int(nTerms.max())
+    J, Y = besselTables(kr, nMax)
+
+    n = numpy.arange(1, nMax + 1)[:, None]
+    with numpy.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        H = J + 1j * Y
+        a = J[1:] / H[1:]
+        b = (kr * J[:-1] - n * J[1:]) / (kr * H[:-1] - n * H[1:])
+        terms = (-1.0) ** n * (n + 0.5) * (b - a)
+
+    terms = numpy.where(n <= nTerms, terms, 0)
+    return terms.sum(axis=0)
+
+
+def sphereRCS(lam, r) -> numpy.ndarray:
+    '''
+    ЭПР идеально проводящей сферы.
+
+    lam - длина волны, м (число или массив).
+    r - радиус сферы, м (число или массив, совместимый по размеру с lam).
+    '''
+    lam, r = numpy.broadcast_arrays(numpy.asarray(lam, dtype=float),
+                                    numpy.asarray(r, dtype=float))
+    kr = (2 * math.pi * r / lam).ravel()
+
+    summ = numpy.empty(kr.shape, dtype=complex)
+    for part in _chunks(termsCount(kr)):
+        summ[part] = _seriesSum(kr[part])
+
+    summ = summ.reshape(lam.shape)
+    return lam * lam * numpy.abs(summ) ** 2 / math.pi
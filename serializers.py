@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+'''
+Модуль для записи и чтения результатов расчетов в разных форматах.
+
+Формат выбирается по расширению файла:
+    .xml - формат Task1 (для каждого столбца name - блок <namedata>
+        с элементами <name>);
+    .txt - текстовые столбцы в формате Task2 ('%9.7f' через 4 пробела),
+        имена столбцов хранятся в файле с дополнительным расширением
+        .json;
+    .csv - текстовые столбцы через запятую с заголовком;
+    .npy - двумерный массив numpy (строка для каждого столбца, общий тип
+        данных), имена столбцов хранятся в файле с дополнительным
+        расширением .json. Чтение отображает массив в память;
+    .npz - архив numpy (массив для каждого столбца);
+    .bin - двоичные массивы подряд без заголовка, описание (имена, типы,
+        размеры, смещения) хранится в файле с дополнительным
+        расширением .json. Чтение отображает массивы в память.
+
+Данные передаются как именованные массивы (столбцы). Для форматов .npy
+(если тип данных столбцов совпадает), .npz и .bin массивы записываются
+без копирования, текстовые форматы форматируют данные блоками и
+принимают только одномерные столбцы одинаковой длины.
+'''
+
+import json
+import os
+import xml.etree.ElementTree as ElementTree
+
+import numpy
+
+import tabulate
+
+# Количество строк, форматируемых за один раз в текстовых форматах
+chunkSize = 1 << 16
+
+_writers = {}
+_readers = {}
+
+
+def register(extension: str, writer, reader):
+    '''
+    Зарегистрировать формат.
+
+    extension - расширение файла (например, '.csv').
+    writer - функция writer(filename, columns), columns - словарь
+        {имя: массив}.
+    reader - функция reader(filename), возвращающая словарь {имя: массив}.
+    '''
+    _writers[extension.lower()] = writer
+    _readers[extension.lower()] = reader
+
+
+def _extension(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in _writers:
+        raise ValueError('Неизвестный формат файла: {}'.format(filename))
+    return extension
+
+
+def save(filename: str, **columns):
+    '''
+    Записать именованные массивы в файл, формат выбирается по расширению.
+    Например: save('results.txt', lambd=lambd, rcs=RCS).
+    '''
+    columns = {name: numpy.asarray(values) for name, values in columns.items()}
+    _writers[_extension(filename)](filename, columns)
+
+
+def load(filename: str) -> dict:
+    '''
+    Прочитать файл, записанный функцией save. Возвращает словарь
+    {имя: массив}.
+    '''
+    return _readers[_extension(filename)](filename)
+
+
+def _checkTextColumns(columns: dict):
+    '''
+    Проверить, что столбцы для текстовых форматов одномерные и одной
+    длины.
+    '''
+    if any(values.ndim != 1 for values in columns.values()):
+        raise ValueError('Текстовые форматы поддерживают только одномерные столбцы')
+    if len({len(values) for values in columns.values()}) > 1:
+        raise ValueError('Столбцы должны быть одинаковой длины')
+
+
+def _rowChunks(columns: dict):
+    '''
+    Генератор блоков строк таблицы из одномерных столбцов одной длины
+    (массив размером (количество строк, количество столбцов)).
+    '''
+    table = numpy.column_stack(list(columns.values()))
+    for start in range(0, len(table), chunkSize):
+        yield table[start:start + chunkSize]
+
+
+# Формат XML (Task1)
+
+def writeXML(filename: str, columns: dict):
+    _checkTextColumns(columns)
+    with open(filename, 'w', buffering=tabulate.bufferSize) as f:
+        f.write('<?xml version="1.1" encoding="UTF-8" ?>\n')
+        f.write('<data>\n')
+        for name, values in columns.items():
+            f.write('\t<{}data>\n'.format(name))
+            for start in range(0, len(values), chunkSize):
+                f.write(tabulate.formatValues(values[start:start + chunkSize],
+                                              name))
+            f.write('\t</{}data>\n'.format(name))
+        f.write('</data>')
+
+
+def readXML(filename: str) -> dict:
+    columns = {}
+    for _, elem in ElementTree.iterparse(filename):
+        if elem.tag.endswith('data') and elem.tag != 'data':
+            name = elem.tag[:-len('data')]
+            columns[name] = numpy.array([float(item.text) for item in elem])
+            elem.clear()
+    return columns
+
+
+# Текстовый формат Task2
+
+def writeText(filename: str, columns: dict):
+    _checkTextColumns(columns)
+    rowFormat = '    '.join(['%9.7f'] * len(columns)) + '\n'
+    with open(filename, 'w', buffering=tabulate.bufferSize) as f:
+        for rows in _rowChunks(columns):
+            f.write((rowFormat * len(rows)) % tuple(rows.ravel().tolist()))
+
+    with open(filename + '.json', 'w') as f:
+        json.dump(list(columns), f)
+
+
+def readText(filename: str) -> dict:
+    table = numpy.loadtxt(filename, ndmin=2)
+    try:
+        with open(filename + '.json') as f:
+            names = json.load(f)
+    except OSError:
+        # Файл записан без имен столбцов
+        names = ['col{}'.format(n) for n in range(table.shape[1])]
+    return {name: table[:, n] for n, name in enumerate(names)}
+
+
+# Формат CSV
+
+def writeCSV(filename: str, columns: dict):
+    _checkTextColumns(columns)
+    with open(filename, 'w', buffering=tabulate.bufferSize) as f:
+        f.write(','.join(columns) + '\n')
+        for rows in _rowChunks(columns):
+            rowFormat = ','.join(['%r'] * rows.shape[1]) + '\n'
+            f.write((rowFormat * len(rows)) % tuple(rows.ravel().tolist()))
+
+
+def readCSV(filename: str) -> dict:
+    with open(filename) as f:
+        names = f.readline().strip().split(',')
+        table = numpy.loadtxt(f, delimiter=',', ndmin=2)
+    return {name: table[:, n] for n, name in enumerate(names)}
+
+
+# Форматы numpy
+
+def writeNPY(filename: str, columns: dict):
+    shapes = {values.shape for values in columns.values()}
+    if len(shapes) > 1:
+        raise ValueError('Для формата .npy столбцы должны быть одинакового размера')
+    shape = (len(columns),) + (shapes.pop() if shapes else (0,))
+    dtype = numpy.result_type(*columns.values()) if columns else numpy.dtype(float)
+
+    # Строки двумерного массива записываются непосредственно из столбцов
+    with open(filename, 'wb') as f:
+        numpy.lib.format.write_array_header_1_0(
+            f, {'descr': numpy.lib.format.dtype_to_descr(dtype),
+                'fortran_order': False, 'shape': shape})
+        for values in columns.values():
+            numpy.ascontiguousarray(values, dtype=dtype).tofile(f)
+
+    with open(filename + '.json', 'w') as f:
+        json.dump(list(columns), f)
+
+
+def readNPY(filename: str) -> dict:
+    table = numpy.load(filename, mmap_mode='r')
+    try:
+        with open(filename + '.json') as f:
+            names = json.load(f)
+    except OSError:
+        names = ['col{}'.format(n) for n in range(len(table))]
+    return {name: table[n] for n, name in enumerate(names)}
+
+
+def writeNPZ(filename: str, columns: dict):
+    numpy.savez(filename, **columns)
+
+
+def readNPZ(filename: str) -> dict:
+    with numpy.load(filename) as data:
+        return {name: data[name] for name in data.files}
+
+
+# Двоичный формат с отображением в память
+
+def writeBinary(filename: str, columns: dict):
+    header = []
+    offset = 0
+    with open(filename, 'wb') as f:
+        for name, values in columns.items():
+            # ascontiguousarray превращает массив размерности 0 в одномерный,
+            # поэтому размер берется у исходного массива
+            shape = list(values.shape)
+            values = numpy.ascontiguousarray(values)
+            values.tofile(f)
+            header.append({'name': name, 'dtype': values.dtype.str,
+                           'shape': shape, 'offset': offset})
+            offset += values.nbytes
+
+    with open(filename + '.json', 'w') as f:
+        json.dump(header, f)
+
+
+def readBinary(filename: str) -> dict:
+    with open(filename + '.json') as f:
+        header = json.load(f)
+
+    columns = {}
+    for item in header:
+        shape = tuple(item['shape'])
+        if numpy.prod(shape) == 0:
+            columns[item['name']] = numpy.zeros(shape, dtype=item['dtype'])
+            continue
+        # numpy.memmap не создает массивы размерности 0
+        columns[item['name']] = numpy.memmap(filename, dtype=item['dtype'],
+                                             mode='r', offset=item['offset'],
+                                             shape=shape or (1,)).reshape(shape)
+    return columns
+
+
+register('.xml', writeXML, readXML)
+register('.txt', writeText, readText)
+register('.csv', writeCSV, readCSV)
+register('.npy', writeNPY, readNPY)
+register('.npz', writeNPZ, readNPZ)
+register('.bin', writeBinary, readBinary)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+'''
+Модуль с источниками плоской волны для метода FDTD.
+
+Все источники имеют общий интерфейс: метод getE(m, q) рассчитывает поле
+в дискретной точке пространства m в дискретный момент времени q и
+принимает как числа, так и массивы numpy, поэтому последовательность
+значений источника для многих временных шагов рассчитывается за один
+вызов (см. Source.getTable).
+'''
+
+import abc
+
+import numpy
+
+
+class Source(abc.ABC):
+    '''
+    Базовый класс для источников плоской волны.
+    Sc - число Куранта.
+    eps - относительная диэлектрическая проницаемость среды, в которой расположен источник.
+    mu - относительная магнитная проницаемость среды, в которой расположен источник.
+    '''
+    def __init__(self, Sc=1.0, eps=1.0, mu=1.0):
+        self.Sc = Sc
+        self.eps = eps
+        self.mu = mu
+
+    def _delay(self, m, q):
+        '''
+        Время (в отсчетах) с учетом запаздывания волны до точки m
+        '''
+        return q - m * numpy.sqrt(self.eps * self.mu) / self.Sc
+
+    @abc.abstractmethod
+    def getE(self, m, q):
+        '''
+        Расчет поля E в дискретной точке пространства m
+        в дискретный момент времени q
+        '''
+
+    def getTable(self, m, qStart: int, count: int, qShift=0.0):
+        '''
+        Значения поля E в точке m для моментов времени
+        qStart + qShift, ..., qStart + count - 1 + qShift.
+        '''
+        return self.getE(m, numpy.arange(qStart, qStart + count) + qShift)
+
+    def getBlocks(self, m, maxTime: int, blockSize: int, qShift=0.0):
+        '''
+        Генератор значений поля E в точке m для моментов времени
+        0..maxTime-1 блоками по blockSize отсчетов (для очень длинных
+        расчетов, когда таблица целиком не нужна).
+        '''
+        for qStart in range(0, maxTime, blockSize):
+            yield self.getTable(m, qStart, min(blockSize, maxTime - qStart),
+                                qShift)
+
+
+class GaussianPlaneWave(Source):
+    ''' Класс с уравнением плоской волны для гауссова сигнала в дискретном виде
+    d - определяет задержку сигнала.
+    w - определяет ширину сигнала.
+    Sc - число Куранта.
+    eps - относительная диэлектрическая проницаемость среды, в которой расположен источник.
+    mu - относительная магнитная проницаемость среды, в которой расположен источник.
+    '''
+    def __init__(self, d, w, Sc=1.0, eps=1.0, mu=1.0):
+        super().__init__(Sc, eps, mu)
+        self.d = d
+        self.w = w
+
+    def getE(self, m, q):
+        '''
+        Расчет поля E в дискретной точке пространства m
+        в дискретный момент времени q
+        '''
+        return numpy.exp(-((self._delay(m, q) - self.d) / self.w) ** 2)
+
+
+class GaussianPlaneWaveM(GaussianPlaneWave):
+    ''' Класс с уравнением плоской волны для гауссова сигнала,
+    модулированного синусоидой, в дискретном виде
+    d - определяет задержку сигнала.
+    w - определяет ширину сигнала.
+    Tm - период несущей (в отсчетах).
+    Sc - число Куранта.
+    eps - относительная диэлектрическая проницаемость среды, в которой расположен источник.
+    mu - относительная магнитная проницаемость среды, в которой расположен источник.
+    '''
+    def __init__(self, d, w, Tm, Sc=1.0, eps=1.0, mu=1.0):
+        super().__init__(d, w, Sc, eps, mu)
+        self.Tm = Tm
+
+    def getE(self, m, q):
+        '''
+        Расчет поля E в дискретной точке пространства m
+        в дискретный момент времени q
+        '''
+        return numpy.sin(2 * numpy.pi * q / self.Tm) * super().getE(m, q)
+
+
+class RickerWavelet(Source):
+    ''' Класс с уравнением плоской волны для вейвлета Рикера в дискретном виде
+    Np - количество отсчетов на длину волны, соответствующую максимуму спектра.
+    Md - задержка сигнала (в периодах, соответствующих Np).
+    Sc - число Куранта.
+    eps - относительная диэлектрическая проницаемость среды, в которой расположен источник.
+    mu - относительная магнитная проницаемость среды, в которой расположен источник.
+    '''
+    def __init__(self, Np, Md, Sc=1.0, eps=1.0, mu=1.0):
+        super().__init__(Sc, eps, mu)
+        self.Np = Np
+        self.Md = Md
+
+    def getE(self, m, q):
+        '''
+        Расчет поля E в дискретной точке пространства m
+        в дискретный момент времени q
+        '''
+        t = (numpy.pi * (self.Sc * self._delay(m, q) / self.Np - self.Md)) ** 2
+        return (1 - 2 * t) * numpy.exp(-t)
+
+
+class ModulatedSinc(Source):
+    ''' Класс с уравнением плоской волны для сигнала вида sinc,
+    модулированного синусоидой, в дискретном виде
+    d - определяет задержку сигнала.
+    w - определяет ширину сигнала (расстояние между нулями sinc в отсчетах).
+    Tm - период несущей (в отсчетах).
+    Sc - число Куранта.
+    eps - относительная диэлектрическая проницаемость среды, в которой расположен источник.
+    mu - относительная магнитная проницаемость среды, в которой расположен источник.
+    '''
+    def __init__(self, d, w, Tm, Sc=1.0, eps=1.0, mu=1.0):
+        super().__init__(Sc, eps, mu)
+        self.d = d
+        self.w = w
+        self.Tm = Tm
+
+    def getE(self, m, q):
+        '''
+        Расчет поля E в дискретной точке пространства m
+        в дискретный момент времени q
+        '''
+        t = self._delay(m, q) - self.d
+        return numpy.sinc(t / self.w) * numpy.sin(2 * numpy.pi * t / self.Tm)
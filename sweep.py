@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+'''
+Модуль для параллельного расчета ЭПР сферы для множества вариантов
+исходных данных (радиус, минимальная и максимальная частота).
+
+Все точки (вариант, длина волны) разбиваются на блоки, которые
+рассчитываются в пуле процессов. Каждый рассчитанный блок сразу же
+записывается в файл .npy, отображенный в память, поэтому результаты
+сохраняются по мере расчета.
+
+Если задан кэш результатов (модуль cache), ЭПР для каждого варианта
+сохраняется в нем отдельно, и при повторном расчете рассчитываются
+только варианты, которых нет в кэше.
+
+Запуск из командной строки (все варианты из файла задания):
+    python sweep.py --output rcs.npy
+'''
+
+import argparse
+import multiprocessing
+import os
+
+import numpy
+
+import Task2
+import cache
+import rcs
+
+# Скорость света в вакууме
+c = 300000000
+
+
+def wavelengths(fmin: float, fmax: float, N: int) -> numpy.ndarray:
+    '''
+    Сетка длин волн для варианта, как в Task2: N точек от длины волны,
+    соответствующей fmax, с шагом (lambd_max - lambd_min) / N.
+    '''
+    lambd_min = c / fmax
+    lambd_max = c / fmin
+    return lambd_min + numpy.arange(N) * ((lambd_max - lambd_min) / N)
+
+
+def _chunkRCS(task):
+    '''
+    Расчет ЭПР для одного блока точек (выполняется в пуле процессов).
+    '''
+    start, lam, r = task
+    return start, Task2.cntRCS(lam, r)
+
+
+def rcsSweep(variants, N: int = 300, processes: int = None,
+             chunkSize: int = 4096, output: str = None,
+             resultCache: cache.ResultCache = None):
+    '''
+    Рассчитать ЭПР для всех вариантов.
+
+    variants - список параметров вариантов [r, fmin, fmax] (в формате,
+        который возвращает Task2.request_www).
+    N - количество точек по длине волны для каждого варианта.
+    processes - количество процессов (по умолчанию - по числу ядер).
+    chunkSize - количество точек в одном блоке.
+    output - имя файла .npy для записи ЭПР по мере расчета. Длины волн
+        записываются в файл с суффиксом _lambda.
+    resultCache - кэш результатов (cache.ResultCache) или None.
+    Возвращает массивы длин волн и ЭПР размером (количество вариантов, N).
+    '''
+    variants = numpy.asarray(variants, dtype=float).reshape(-1, 3)
+    lambd = numpy.array([wavelengths(fmin, fmax, N)
+                         for r, fmin, fmax in variants]).reshape(-1, N)
+    radius = numpy.repeat(variants[:, 0], N)
+
+    if output is not None:
+        numpy.save(os.path.splitext(output)[0] + '_lambda.npy', lambd)
+        RCS = numpy.lib.format.open_memmap(output, mode='w+',
+                                           dtype=float, shape=lambd.shape)
+    else:
+        RCS = numpy.empty(lambd.shape)
+
+    # Варианты, которых нет в кэше
+    rows = numpy.arange(len(variants))
+    if resultCache is not None:
+        keys = [resultCache.key({'function': 'sphereRCS', 'r': r,
+                                 'lambda': lambd[n]}, rcs)
+                for n, r in zip(rows, variants[:, 0])]
+        missing = []
+        for n in rows:
+            result = resultCache.get(keys[n])
+            if result is None:
+                missing.append(n)
+            else:
+                RCS[n] = result['rcs']
+        rows = numpy.array(missing, dtype=int)
+
+    # Номера точек (в развернутых массивах) для расчета
+    points = (rows[:, None] * N + numpy.arange(N)).reshape(-1)
+    flatLambd = lambd.reshape(-1)
+    flatRCS = RCS.reshape(-1)
+    tasks = ((start,
+              flatLambd[points[start:start + chunkSize]],
+              radius[points[start:start + chunkSize]])
+             for start in range(0, len(points), chunkSize))
+
+    if len(points) > 0:
+        with multiprocessing.Pool(processes) as pool:
+            for start, values in pool.imap_unordered(_chunkRCS, tasks):
+                flatRCS[points[start:start + len(values)]] = values
+
+    if resultCache is not None:
+        for n in rows:
+            resultCache.put(keys[n], rcs=numpy.asarray(RCS[n]))
+
+    if output is not None:
+        RCS.flush()
+    return lambd, numpy.asarray(RCS)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Расчет ЭПР сферы для нескольких вариантов задания')
+    parser.add_argument('numbers', nargs='*', type=int,
+                        help='номера вариантов (по умолчанию - все)')
+    parser.add_argument('--url', default=Task2.url,
+                        help='путь к файлу с вариантами или ссылка на него')
+    parser.add_argument('-N', type=int, default=300,
+                        help='количество точек по длине волны')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='количество процессов')
+    parser.add_argument('--chunk', type=int, default=4096,
+                        help='количество точек в одном блоке')
+    parser.add_argument('--output', default='rcs_sweep.npy',
+                        help='файл для записи результатов')
+    parser.add_argument('--cache', default=None,
+                        help='папка кэша результатов (по умолчанию - без кэша)')
+    args = parser.parse_args()
+
+    table = Task2.request_all(args.url)
+    numbers = args.numbers if args.numbers else sorted(table)
+    resultCache = None if args.cache is None else cache.ResultCache(args.cache)
+    rcsSweep([table[n] for n in numbers], args.N, args.processes,
+             args.chunk, args.output, resultCache)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+'''
+Модуль для табулирования функции на больших сетках.
+
+Сетка генерируется и функция вычисляется блоками фиксированного размера,
+каждый блок сразу форматируется целиком и записывается в буферизованный
+файл, поэтому расход памяти не зависит от количества точек.
+'''
+
+import numpy
+
+# Количество точек в одном блоке
+chunkSize = 1 << 20
+
+# Размер буфера файла для записи
+bufferSize = 1 << 22
+
+
+def pointsCount(xStart: float, xEnd: float, dx: float) -> int:
+    '''
+    Количество точек сетки (как в Task1: int((xEnd - xStart) / dx)).
+    '''
+    return int((xEnd - xStart) / dx)
+
+
+def gridChunks(xStart: float, dx: float, count: int, size: int = None):
+    '''
+    Генератор блоков сетки x_i = i * dx + xStart, i = 0..count-1.
+    '''
+    if size is None:
+        size = chunkSize
+    for start in range(0, count, size):
+        yield numpy.arange(start, min(start + size, count)) * dx + xStart
+
+
+def tabulateChunks(F, xStart: float, xEnd: float, dx: float,
+                   size: int = None):
+    '''
+    Генератор пар (x, F(x)) для блоков сетки.
+    '''
+    for x in gridChunks(xStart, dx, pointsCount(xStart, xEnd, dx), size):
+        yield x, F(x)
+
+
+def sample(F, xStart: float, xEnd: float, dx: float, maxPoints: int):
+    '''
+    Значения функции не более чем в maxPoints точках сетки (каждая k-я
+    точка), например, для построения графика.
+    '''
+    count = pointsCount(xStart, xEnd, dx)
+    step = max(1, -(-count // maxPoints))
+    x = numpy.arange(0, count, step) * dx + xStart
+    return x, F(x)
+
+
+def formatValues(values: numpy.ndarray, tag: str) -> str:
+    '''
+    Отформатировать блок значений в строки вида '\\t\\t<tag>value</tag>\\n'.
+    Значения записываются так же, как str(x) для чисел numpy.float64.
+    '''
+    if len(values) == 0:
+        return ''
+    opening = '\t\t<{}>'.format(tag)
+    closing = '</{}>\n'.format(tag)
+    return (opening
+            + (closing + opening).join(map(repr, values.tolist()))
+            + closing)
+
+
+def writeXML(filename: str, F, xStart: float, xEnd: float, dx: float,
+             size: int = None):
+    '''
+    Табулировать функцию F и записать результат в XML-файл в формате
+    Task1. Сначала записываются все значения x, затем все значения y,
+    поэтому сетка генерируется дважды, а функция вычисляется один раз
+    для каждого блока.
+    '''
+    count = pointsCount(xStart, xEnd, dx)
+    with open(filename, 'w', buffering=bufferSize) as f:
+        # Шапка файла
+        f.write('<?xml version="1.1" encoding="UTF-8" ?>\n')
+        # Данные
+        f.write('<data>\n')
+        f.write('\t<xdata>\n')
+        for x in gridChunks(xStart, dx, count, size):
+            f.write(formatValues(x, 'x'))
+        f.write('\t</xdata>\n')
+        f.write('\t<ydata>\n')
+        for x in gridChunks(xStart, dx, count, size):
+            f.write(formatValues(F(x), 'y'))
+        f.write('\t</ydata>\n')
+        f.write('</data>')
@@ -2,9 +2,18 @@
 '''
 Модуль со вспомогательными классами и функциями, не связанные напрямую с
 методом FDTD
+
+Библиотека matplotlib импортируется только при первом построении графика,
+поэтому датчики и спектры можно использовать без нее (например, в
+процессах для пакетных расчетов).
 '''
 
-import pylab
+import functools
+import math
+import os
+import queue
+import threading
+
 import numpy
 from typing import List
 import numpy.fft as fft
@@ -14,16 +23,20 @@ class Probe:
     '''
     Класс для хранения временного сигнала в датчике.
     '''
-    def __init__(self, position: int, maxTime: int):
+    def __init__(self, position: int, maxTime: int, nConfigs: int = None):
         '''
         position - положение датчика (номер ячейки).
         maxTime - максимально количество временных шагов для хранения в датчике.
+        nConfigs - количество одновременно рассчитываемых конфигураций.
+            Если задано, сигналы хранятся в массивах размером
+            (nConfigs, maxTime).
         '''
         self.position = position
 
         # Временные сигналы для полей E и H
-        self.E = numpy.zeros(maxTime)
-        self.H = numpy.zeros(maxTime)
+        batch = () if nConfigs is None else (nConfigs,)
+        self.E = numpy.zeros(batch + (maxTime,))
+        self.H = numpy.zeros(batch + (maxTime,))
 
         # Номер временного шага для сохранения полей
         self._time = 0
@@ -32,10 +45,429 @@ class Probe:
         '''
         Добавить данные по полям E и H в датчик.
         '''
-        self.E[self._time] = E[self.position]
-        self.H[self._time] = H[self.position]
+        self.E[..., self._time] = E[..., self.position]
+        self.H[..., self._time] = H[..., self.position]
+        self._time += 1
+
+
+class ProbeSet:
+    '''
+    Класс для хранения временных сигналов сразу в нескольких датчиках.
+
+    Поля во всех датчиках регистрируются за одну операцию (выборкой по
+    массиву номеров ячеек) в заранее выделенные массивы размером
+    (количество датчиков, количество отсчетов).
+    '''
+    def __init__(self, positions: List[int], maxTime: int,
+                 decimation: int = 1, ringBuffer: bool = False,
+                 dtype=numpy.float64, nConfigs: int = None):
+        '''
+        positions - положения датчиков (номера ячеек).
+        maxTime - максимальное количество временных шагов для хранения в
+            датчиках. В режиме кольцевого буфера - количество последних
+            сохраняемых отсчетов.
+        decimation - сохранять каждый decimation-й временной шаг (шаг
+            дискретизации сохраненных сигналов равен decimation * dt).
+        ringBuffer - хранить только последние отсчеты (кольцевой буфер).
+        dtype - тип данных для хранения сигналов (например, numpy.float32).
+        nConfigs - количество одновременно рассчитываемых конфигураций.
+            Если задано, сигналы хранятся в массивах размером
+            (nConfigs, количество датчиков, количество отсчетов).
+        '''
+        self.positions = numpy.array(positions, dtype=int)
+        self.decimation = decimation
+        self.ringBuffer = ringBuffer
+
+        if ringBuffer:
+            size = maxTime
+        else:
+            size = (maxTime + decimation - 1) // decimation
+        self.size = size
+
+        # Временные сигналы для полей E и H
+        batch = () if nConfigs is None else (nConfigs,)
+        self.E = numpy.zeros(batch + (len(self.positions), size), dtype=dtype)
+        self.H = numpy.zeros(batch + (len(self.positions), size), dtype=dtype)
+
+        # Количество вызовов addData и количество сохраненных отсчетов
+        self._step = 0
+        self._time = 0
+
+    def addData(self, E: List[float], H: List[float]):
+        '''
+        Добавить данные по полям E и H во все датчики.
+        '''
+        step = self._step
+        self._step += 1
+        if step % self.decimation != 0:
+            return
+
+        index = self._time % self.size if self.ringBuffer else self._time
+        self.E[..., index] = E[..., self.positions]
+        self.H[..., index] = H[..., self.positions]
+        self._time += 1
+
+    def _ordered(self, data: numpy.ndarray) -> numpy.ndarray:
+        '''
+        Расположить отсчеты кольцевого буфера в порядке времени.
+        '''
+        if not self.ringBuffer:
+            return data
+        if self._time < self.size:
+            return data[..., :self._time]
+        return numpy.roll(data, -(self._time % self.size), axis=-1)
+
+    def getE(self) -> numpy.ndarray:
+        '''
+        Сигналы поля E во всех датчиках в порядке времени.
+        '''
+        return self._ordered(self.E)
+
+    def getH(self) -> numpy.ndarray:
+        '''
+        Сигналы поля H во всех датчиках в порядке времени.
+        '''
+        return self._ordered(self.H)
+
+    def toProbes(self) -> List[Probe]:
+        '''
+        Представить сигналы в виде списка экземпляров класса Probe
+        (например, для функции showProbeSignals).
+        '''
+        E = self.getE()
+        H = self.getH()
+        probes = []
+        for n, position in enumerate(self.positions):
+            probe = Probe(int(position), 0)
+            probe.E = E[..., n, :]
+            probe.H = H[..., n, :]
+            probe._time = E.shape[-1]
+            probes.append(probe)
+        return probes
+
+
+class DFTProbeSet:
+    '''
+    Класс для расчета спектров сигналов в датчиках непосредственно во
+    время моделирования (дискретное преобразование Фурье на заданных
+    частотах, накапливаемое на каждом временном шаге).
+
+    Требуемая память пропорциональна количеству частот, а не количеству
+    временных шагов, а спектры доступны в любой момент расчета.
+    '''
+    # Период (в отсчетах) точного пересчета фазовых множителей, чтобы
+    # ошибки округления при их последовательном умножении не накапливались
+    resyncStep = 1024
+
+    def __init__(self, positions: List[int], frequencies: List[float],
+                 dt: float, windows: List[int] = None, nConfigs: int = None):
+        '''
+        positions - положения датчиков (номера ячеек).
+        frequencies - частоты, на которых рассчитывается спектр.
+        dt - шаг дискретизации по времени.
+        windows - для каждого датчика количество отсчетов, после которого
+            сигнал перестает учитываться (временное окно); None - без окна.
+        nConfigs - количество одновременно рассчитываемых конфигураций.
+            Если задано, спектры хранятся в массивах размером
+            (nConfigs, количество датчиков, количество частот).
+        '''
+        self.positions = numpy.array(positions, dtype=int)
+        self.frequencies = numpy.array(frequencies, dtype=float)
+        self.dt = dt
+
+        if windows is None:
+            windows = [None] * len(self.positions)
+        self.windows = numpy.array(
+            [numpy.iinfo(numpy.int64).max if w is None else w for w in windows],
+            dtype=numpy.int64)
+        self._active = numpy.ones(len(self.positions))
+
+        # Накопленные спектры полей E и H
+        batch = () if nConfigs is None else (nConfigs,)
+        shape = batch + (len(self.positions), len(self.frequencies))
+        self.E = numpy.zeros(shape, dtype=complex)
+        self.H = numpy.zeros(shape, dtype=complex)
+        self._term = numpy.zeros(shape, dtype=complex)
+
+        # Фазовый множитель exp(-j 2 pi f n dt) для текущего отсчета
+        # и его изменение за один шаг
+        self._phase = numpy.ones(len(self.frequencies), dtype=complex)
+        self._phaseStep = numpy.exp(-2j * numpy.pi * self.frequencies * dt)
+
+        # Номер временного отсчета
+        self._time = 0
+
+    def addData(self, E: List[float], H: List[float]):
+        '''
+        Добавить вклад текущих полей E и H в спектры всех датчиков.
+        '''
+        n = self._time
+        if n % self.resyncStep == 0:
+            self._phase[:] = numpy.exp(-2j * numpy.pi * self.frequencies * n * self.dt)
+            self._active[:] = self.windows > n
+        elif (self.windows == n).any():
+            self._active[self.windows <= n] = 0
+
+        term = self._term
+        for field, result in ((E, self.E), (H, self.H)):
+            values = field[..., self.positions] * self._active
+            numpy.multiply(values[..., None], self._phase, out=term)
+            result += term
+
+        self._phase *= self._phaseStep
         self._time += 1
 
+    def getE(self) -> numpy.ndarray:
+        '''
+        Спектры поля E во всех датчиках на заданных частотах.
+        '''
+        return self.E
+
+    def getH(self) -> numpy.ndarray:
+        '''
+        Спектры поля H во всех датчиках на заданных частотах.
+        '''
+        return self.H
+
+
+class SnapshotFile:
+    '''
+    Класс для записи распределения поля E каждые step шагов в файл .npy,
+    отображенный в память (массив размером (количество кадров, maxSize)),
+    поэтому записанные кадры не хранятся в оперативной памяти.
+
+    Добавляется в расчет как датчик (FDTDEngine.addProbe).
+    '''
+    def __init__(self, filename: str, maxSize: int, maxTime: int,
+                 step: int = 1, dtype=numpy.float32, nConfigs: int = None,
+                 resume: bool = False):
+        '''
+        filename - имя файла .npy.
+        maxSize - размер области моделирования в отсчетах.
+        maxTime - максимальное количество временных шагов.
+        step - период записи кадров (в шагах).
+        dtype - тип данных для хранения кадров.
+        nConfigs - количество одновременно рассчитываемых конфигураций.
+            Если задано, файл содержит массив размером
+            (количество кадров, nConfigs, maxSize).
+        resume - открыть существующий файл для продолжения записи (при
+            восстановлении расчета из контрольной точки), а не создавать
+            новый.
+        '''
+        self.filename = filename
+        self.step = step
+        batch = () if nConfigs is None else (nConfigs,)
+        frames = (maxTime + step - 1) // step
+        self.E = numpy.lib.format.open_memmap(
+            filename, mode='r+' if resume else 'w+', dtype=dtype,
+            shape=(frames,) + batch + (maxSize,))
+
+        # Количество вызовов addData и количество записанных кадров
+        self._step = 0
+        self._time = 0
+
+    def addData(self, E: List[float], H: List[float]):
+        '''
+        Записать кадр с полем E (каждый step-й вызов).
+        '''
+        step = self._step
+        self._step += 1
+        if step % self.step == 0:
+            self.E[self._time] = E
+            self._time += 1
+
+    def flush(self):
+        '''
+        Сбросить записанные кадры на диск.
+        '''
+        self.E.flush()
+
+
+class InteractiveBackend:
+    '''
+    Отображение анимации в интерактивном окне matplotlib. Отрисовка
+    выполняется синхронно, в том же потоке, что и расчет.
+    '''
+    def createFigure(self):
+        '''
+        Создать окно для графика
+        '''
+        import pylab
+
+        # Включить интерактивный режим для анимации
+        pylab.ion()
+        return pylab.subplots()
+
+    def updateData(self, display, data: List[float], timeCount: int):
+        '''
+        Отрисовать новое распределение поля
+        '''
+        display._line.set_ydata(data)
+        display._ax.set_title(str(timeCount))
+        display._fig.canvas.draw()
+        display._fig.canvas.flush_events()
+
+    def stop(self):
+        '''
+        Завершить отображение
+        '''
+        import pylab
+        pylab.ioff()
+
+
+class HeadlessBackend:
+    '''
+    Отображение без вывода графики (для запуска без дисплея).
+    Все операции ничего не делают.
+    '''
+    def createFigure(self):
+        return None, None
+
+    def updateData(self, display, data: List[float], timeCount: int):
+        pass
+
+    def stop(self):
+        pass
+
+
+class OffscreenBackend:
+    '''
+    Запись кадров анимации в видеофайл или в набор изображений.
+
+    Распределения поля копируются в ограниченную очередь, из которой их
+    забирает и отрисовывает фоновый поток. Если очередь заполнена, кадр
+    пропускается, поэтому расчет никогда не ждет отрисовки.
+    '''
+    # Расширения файлов, которые записываются как видео
+    videoExtensions = ('.mp4', '.avi', '.mkv', '.gif')
+
+    def __init__(self, output: str, queueSize: int = 16, dpi: int = 100,
+                 fps: int = 25):
+        '''
+        output - имя видеофайла (.mp4, .avi, .mkv, .gif) или папки, в
+            которую записываются кадры в формате PNG.
+        queueSize - максимальное количество кадров в очереди.
+        dpi - разрешение кадров.
+        fps - частота кадров видео.
+        '''
+        self.output = output
+        self.dpi = dpi
+        self.fps = fps
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queueSize)
+        self._thread = None
+        self._error = None
+
+    def createFigure(self):
+        '''
+        Создать график без окна
+        '''
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        return fig, fig.add_subplot()
+
+    def updateData(self, display, data: List[float], timeCount: int):
+        '''
+        Поставить кадр в очередь на отрисовку
+        '''
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._render,
+                                            args=(display,), daemon=True)
+            self._thread.start()
+
+        try:
+            self._queue.put_nowait((numpy.array(data), timeCount))
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        '''
+        Дождаться отрисовки всех кадров из очереди. Если при отрисовке
+        произошла ошибка (например, не установлен ffmpeg), она
+        возбуждается повторно.
+        '''
+        if self._thread is not None:
+            # Поток мог завершиться из-за ошибки и больше не забирает
+            # кадры из очереди
+            while self._thread.is_alive():
+                try:
+                    self._queue.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+            self._thread.join()
+            self._thread = None
+
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _render(self, display):
+        '''
+        Отрисовка кадров в фоновом потоке. Ошибка сохраняется и
+        возбуждается в методе stop.
+        '''
+        try:
+            self._renderFrames(display)
+        except Exception as error:
+            self._error = error
+
+    def _renderFrames(self, display):
+        writer = None
+        if self.output.lower().endswith(self.videoExtensions):
+            from matplotlib import animation
+            if self.output.lower().endswith('.gif'):
+                writer = animation.PillowWriter(fps=self.fps)
+            else:
+                writer = animation.FFMpegWriter(fps=self.fps)
+            writer.setup(display._fig, self.output, self.dpi)
+        else:
+            os.makedirs(self.output, exist_ok=True)
+
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                break
+
+            data, timeCount = frame
+            display._line.set_ydata(data)
+            display._ax.set_title(str(timeCount))
+            if writer is not None:
+                writer.grab_frame()
+            else:
+                name = 'frame_{:06d}.png'.format(timeCount)
+                display._fig.savefig(os.path.join(self.output, name),
+                                     dpi=self.dpi)
+
+        if writer is not None:
+            writer.finish()
+
+
+def createDisplayBackend(name: str = None):
+    '''
+    Создать объект для вывода анимации по имени.
+
+    name - 'interactive', 'headless' или 'offscreen'. Если не задано,
+        используется значение переменной окружения FDTD_DISPLAY
+        (по умолчанию 'interactive'). Для 'offscreen' имя видеофайла или
+        папки для кадров берется из переменной окружения
+        FDTD_DISPLAY_OUTPUT (по умолчанию папка 'frames').
+    '''
+    if name is None:
+        name = os.environ.get('FDTD_DISPLAY', 'interactive')
+
+    if name == 'interactive':
+        return InteractiveBackend()
+    if name == 'headless':
+        return HeadlessBackend()
+    if name == 'offscreen':
+        return OffscreenBackend(os.environ.get('FDTD_DISPLAY_OUTPUT', 'frames'))
+
+    raise ValueError('Неизвестный способ отображения: {}'.format(name))
+
 
 class AnimateFieldDisplay:
     '''
@@ -45,18 +477,26 @@ class AnimateFieldDisplay:
     def __init__(self,
                  maxXSize: int,
                  minYSize: float, maxYSize: float,
-                 yLabel: str, dx: float):
+                 yLabel: str, dx: float, backend=None):
         '''
         maxXSize - размер области моделирования в отсчетах.
         minYSize, maxYSize - интервал отображения графика по оси Y.
         yLabel - метка для оси Y.
         dx - размер ячейки разбиения.
+        backend - способ вывода анимации: имя (см. createDisplayBackend)
+            или объект InteractiveBackend, HeadlessBackend, OffscreenBackend.
         '''
+        if backend is None or isinstance(backend, str):
+            backend = createDisplayBackend(backend)
+
+        self.backend = backend
         self.dx = dx
         self.maxXSize = maxXSize
         self.minYSize = minYSize
         self.maxYSize = maxYSize
         self._xList = None
+        self._fig = None
+        self._ax = None
         self._line = None
         self._xlabel = 'x, м'
         self._ylabel = yLabel
@@ -69,11 +509,10 @@ class AnimateFieldDisplay:
         '''
         self._xList = numpy.arange(self.maxXSize) * self.dx
 
-        # Включить интерактивный режим для анимации
-        pylab.ion()
-
         # Создание окна для графика
-        self._fig, self._ax = pylab.subplots()
+        self._fig, self._ax = self.backend.createFigure()
+        if self._ax is None:
+            return
 
         # Установка отображаемых интервалов по осям
         self._ax.set_xlim(0, self.maxXSize * self.dx)
@@ -96,6 +535,9 @@ class AnimateFieldDisplay:
         probesPos - список координат датчиков для регистрации временных
             сигналов (в отсчетах).
         '''
+        if self._ax is None:
+            return
+
         # Отобразить положение датчиков
         self._ax.plot([i * self.dx for i in probesPos], [0] * len(probesPos),
                        self._probeStyle)
@@ -106,6 +548,9 @@ class AnimateFieldDisplay:
 
         sourcesPos - список координат источников (в отсчетах).
         '''
+        if self._ax is None:
+            return
+
         # Отобразить положение источников
         self._ax.plot([i * self.dx for i in sourcesPos], [0] * len(sourcesPos),
                       self._sourceStyle)
@@ -116,6 +561,9 @@ class AnimateFieldDisplay:
 
         position - координата X границы (в отсчетах).
         '''
+        if self._ax is None:
+            return
+
         self._ax.plot([position * self.dx, position * self.dx],
                       [self.minYSize, self.maxYSize],
                       '--k')
@@ -124,16 +572,13 @@ class AnimateFieldDisplay:
         '''
         Остановить анимацию
         '''
-        pylab.ioff()
+        self.backend.stop()
 
     def updateData(self, data: List[float], timeCount: int):
         '''
         Обновить данные с распределением поля в пространстве
         '''
-        self._line.set_ydata(data)
-        self._ax.set_title(str(timeCount))
-        self._fig.canvas.draw()
-        self._fig.canvas.flush_events()
+        self.backend.updateData(self, data, timeCount)
 
 
 def showProbeSignals(probes: List[Probe], minYSize: float, maxYSize: float,
@@ -145,6 +590,8 @@ def showProbeSignals(probes: List[Probe], minYSize: float, maxYSize: float,
     minYSize, maxYSize - интервал отображения графика по оси Y.
     dt - шаг дискретизации по времени.
     '''
+    import pylab
+
     # Создание окна с графиков
     fig, ax = pylab.subplots()
 
@@ -167,35 +614,109 @@ def showProbeSignals(probes: List[Probe], minYSize: float, maxYSize: float,
     # Показать окно с графиками
     pylab.show()
 
+def fastFFTSize(n: int) -> int:
+    '''
+    Наименьшее число, не меньшее n, в разложении которого есть только
+    множители 2, 3 и 5. БПФ такой длины выполняется быстро.
+    '''
+    if n <= 1:
+        return 1
+
+    best = 2 ** math.ceil(math.log2(n))
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            # Наименьшее произведение p35 на степень двойки, не меньшее n
+            p235 = p35
+            while p235 < n:
+                p235 *= 2
+            best = min(best, p235)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def fftSize(length: int, dt: float = None, df: float = None) -> int:
+    '''
+    Выбрать размер массива для ПФ.
+
+    length - длина сигнала в отсчетах.
+    dt - шаг дискретизации по времени.
+    df - требуемый шаг по частоте (если задан, вместе с dt).
+    '''
+    size = length
+    if df is not None:
+        size = max(size, math.ceil(1 / (df * dt)))
+    return fastFFTSize(size)
+
+
+@functools.lru_cache(maxsize=64)
+def frequencyAxis(size: int, dt: float) -> numpy.ndarray:
+    '''
+    Неотрицательные частоты для ПФ вещественного сигнала длиной size с
+    шагом дискретизации dt. Результат кэшируется и доступен только для
+    чтения.
+    '''
+    f = fft.rfftfreq(size, dt)
+    f.flags.writeable = False
+    return f
+
+
+def spectra(signals: numpy.ndarray, dt: float, size: int = None,
+            df: float = None):
+    '''
+    Амплитудные спектры одного или сразу нескольких вещественных сигналов.
+
+    signals - сигнал или массив сигналов (время - последняя ось).
+    dt - шаг дискретизации по времени.
+    size - размер массива для ПФ. Если не задан, выбирается по длине
+        сигнала и требуемому шагу по частоте df.
+    Возвращает массив частот и массив модулей спектров.
+    '''
+    signals = numpy.asarray(signals)
+    if size is None:
+        size = fftSize(signals.shape[-1], dt, df)
+    return frequencyAxis(size, dt), numpy.abs(fft.rfft(signals, size))
+
+
 class Spectrum:
     '''
     Класс для получения спектра
     '''
+    # Размер массива для ПФ по умолчанию
+    defaultSize = 2 ** 15
 
-    def __init__(self, probe: float, dt: float, xMax: float):
+    def __init__(self, probe: float, dt: float, xMax: float,
+                 size: int = None, df: float = None):
         '''
-        probe - сигнал, который получает датчик.
+        probe - сигнал, который получает датчик (или массив сигналов).
         dt - шаг дискретизации по времени.
         xMax - максимальная частота на графике спектра.
-        size - размер массива для ПФ.
-        df - шан по частоте.
+        size - размер массива для ПФ. Если не задан, выбирается по длине
+            сигнала (не менее defaultSize) или по требуемому шагу по
+            частоте df.
+        df - шаг по частоте.
         '''
         self.probe = probe
         self.dt = dt
         self.xMax = xMax
-        self.size = 2 ** 15
+        if size is None:
+            length = numpy.shape(probe)[-1]
+            if df is None:
+                length = max(length, self.defaultSize)
+            size = fftSize(length, dt, df)
+        self.size = size
         self.df = 1 / (self.size * self.dt)
 
     def fourierTransform(self):
         '''
-        Функция преобразования Фурье и вывода графика
+        Функция преобразования Фурье (только неотрицательные частоты)
         '''
-        self.f = numpy.arange(-self.size / 2 * self.df,
-                 self.size / 2 * self.df, self.df)
-        self.PF = numpy.abs(fft.fft(self.probe, self.size))
-        self.PF = fft.fftshift(self.PF)
+        self.f, self.PF = spectra(self.probe, self.dt, self.size)
 
     def ShowNorm(self):
+        import pylab
         fig, ax = pylab.subplots()
         ax.set_xlim(0, self.xMax)
         ax.set_xlabel('f, Гц')
@@ -205,6 +726,7 @@ class Spectrum:
         pylab.show()      
 
     def Show(self):
+        import pylab
         fig, ax = pylab.subplots()
         ax.set_xlim(0, self.xMax)
         ax.set_xlabel('f, Гц')
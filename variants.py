@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+'''
+Модуль для загрузки таблицы вариантов задания из XML-файла.
+
+Файл читается потоково (xml.etree.ElementTree.iterparse), за один проход
+строится индекс всех вариантов по номеру, поэтому поиск варианта
+выполняется за O(1). Разобранная таблица сохраняется рядом с файлом
+(файл .npz, привязанный ко времени изменения и размеру XML-файла) и
+кэшируется в памяти процесса, так что повторный разбор не требуется.
+'''
+
+import os
+import xml.etree.ElementTree as ElementTree
+
+import numpy
+
+# Суффикс файла с разобранной таблицей
+cacheSuffix = '.variants.npz'
+
+# Таблицы, уже загруженные в этом процессе: {(путь, mtime, размер): таблица}
+_tables = {}
+
+
+class VariantTable:
+    '''
+    Таблица вариантов: для каждого номера варианта - значения параметров
+    в том порядке, в котором они указаны в файле.
+    '''
+    def __init__(self, numbers, names, values):
+        '''
+        numbers - номера вариантов.
+        names - имена параметров.
+        values - значения параметров, массив (количество вариантов,
+            количество параметров).
+        '''
+        self.numbers = numpy.asarray(numbers, dtype=int)
+        self.names = [str(name) for name in names]
+        self.values = numpy.asarray(values, dtype=float).reshape(
+            len(self.numbers), len(self.names))
+        self._index = {int(n): i for i, n in enumerate(self.numbers)}
+
+    def __getitem__(self, number: int) -> list:
+        '''
+        Параметры варианта в виде списка (формат Task2.request_www).
+        '''
+        return self.values[self._index[int(number)]].tolist()
+
+    def __contains__(self, number: int) -> bool:
+        return int(number) in self._index
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def asDict(self, number: int) -> dict:
+        '''
+        Параметры варианта в виде словаря {имя параметра: значение}.
+        '''
+        return dict(zip(self.names, self[number]))
+
+
+def parseVariants(file) -> VariantTable:
+    '''
+    Разобрать XML-файл с вариантами за один проход.
+
+    file - путь к файлу или файловый объект. Вариантом считается любой
+        элемент с атрибутом number, остальные его атрибуты - параметры.
+    '''
+    numbers = []
+    values = []
+    names = None
+    root = None
+
+    for event, elem in ElementTree.iterparse(file, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+
+        if 'number' in elem.attrib:
+            params = [(name, value) for name, value in elem.attrib.items()
+                      if name != 'number']
+            if names is None:
+                names = [name for name, _ in params]
+            elif [name for name, _ in params] != names:
+                raise ValueError('Разный набор параметров у вариантов: {}'
+                                 .format(elem.attrib['number']))
+
+            numbers.append(int(elem.attrib['number']))
+            values.append([float(value) for _, value in params])
+
+            # Освободить память, занятую уже разобранными элементами
+            elem.clear()
+            root.clear()
+
+    return VariantTable(numbers, names or [], values)
+
+
+def _download(link: str) -> str:
+    '''
+    Скачать файл по ссылке в текущую папку (если он еще не скачан).
+    Имя файла - последняя часть ссылки.
+    '''
+    path = link.split('/')[-1]
+    if not os.path.exists(path):
+        import requests
+
+        r = requests.get(link, allow_redirects=True)
+        r.raise_for_status()
+        with open(path, 'wb') as f:
+            f.write(r.content)
+    return path
+
+
+def _loadCache(cachePath: str, stat) -> VariantTable:
+    '''
+    Прочитать разобранную таблицу, если она соответствует XML-файлу.
+    '''
+    try:
+        with numpy.load(cachePath) as data:
+            if (int(data['mtime']) != stat.st_mtime_ns
+                    or int(data['size']) != stat.st_size):
+                return None
+            return VariantTable(data['numbers'], data['names'], data['values'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _saveCache(cachePath: str, stat, table: VariantTable):
+    '''
+    Сохранить разобранную таблицу рядом с XML-файлом.
+    '''
+    tmpPath = '{}.{}.tmp'.format(cachePath, os.getpid())
+    try:
+        with open(tmpPath, 'wb') as f:
+            numpy.savez(f, numbers=table.numbers,
+                        names=numpy.array(table.names, dtype=str),
+                        values=table.values,
+                        mtime=stat.st_mtime_ns, size=stat.st_size)
+        os.replace(tmpPath, cachePath)
+    except OSError:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+
+
+def loadVariants(source, useCache: bool = True) -> VariantTable:
+    '''
+    Загрузить таблицу вариантов.
+
+    source - путь к XML-файлу, файловый объект или ссылка (http/https;
+        файл скачивается в текущую папку, если его там еще нет).
+    useCache - использовать таблицы, уже загруженные в этом процессе и
+        сохраненные рядом с файлом.
+    '''
+    if not isinstance(source, (str, os.PathLike)):
+        return parseVariants(source)
+
+    source = os.fspath(source)
+    if source.startswith(('http://', 'https://')):
+        source = _download(source)
+
+    if not useCache:
+        return parseVariants(source)
+
+    stat = os.stat(source)
+    key = (os.path.abspath(source), stat.st_mtime_ns, stat.st_size)
+    if key in _tables:
+        return _tables[key]
+
+    cachePath = source + cacheSuffix
+    table = _loadCache(cachePath, stat)
+    if table is None:
+        table = parseVariants(source)
+        _saveCache(cachePath, stat, table)
+
+    _tables[key] = table
+    return table